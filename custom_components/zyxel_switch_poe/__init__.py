@@ -1,18 +1,26 @@
-import re
 import math
+import time
 import logging
 import asyncio
+import contextvars
 
 from random import random
+from functools import partial
 from datetime import timedelta
+from contextlib import nullcontext, contextmanager
 
 import aiohttp
 import voluptuous as vol
 
+from yarl import URL
+
 from homeassistant import config_entries
+from homeassistant.core import callback
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers import device_registry as dr
-from homeassistant.helpers.aiohttp_client import async_create_clientsession
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util import dt as dt_util
 from homeassistant.const import STATE_ON, STATE_OFF, CONF_HOST, CONF_NAME, CONF_PASSWORD, CONF_SCAN_INTERVAL, EVENT_HOMEASSISTANT_STOP
 
 from homeassistant.helpers.update_coordinator import (
@@ -20,12 +28,53 @@ from homeassistant.helpers.update_coordinator import (
     UpdateFailed,
 )
 
-from .const import DOMAIN, KEY_POESWITCH, METHOD_POST, METHOD_GET, BRAND
+from .const import (
+    DOMAIN, KEY_POESWITCH, METHOD_POST, METHOD_GET, BRAND,
+    CONF_PARALLEL_REQUESTS, DEFAULT_PARALLEL_REQUESTS, MAX_PARALLEL_REQUESTS,
+    CONF_POWER_SCAN_INTERVAL, DEFAULT_POWER_SCAN_INTERVAL, LINK_SCAN_INTERVAL, SYSTEM_SCAN_INTERVAL,
+    CONF_OPTIMISTIC, DEFAULT_OPTIMISTIC, CONF_POWER_DEADBAND, DEFAULT_POWER_DEADBAND,
+    CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING, ADAPTIVE_MIN_INTERVAL, ADAPTIVE_BACKOFF, ADAPTIVE_POWER_THRESHOLD,
+    CONF_LINK_WATCH_INTERVAL, DEFAULT_LINK_WATCH_INTERVAL, MAX_LINK_WATCH_INTERVAL, EVENT_LINK_CHANGED,
+    CONF_RECORD_TRANSCRIPT, DEFAULT_RECORD_TRANSCRIPT, TRANSCRIPT_FLUSH_ENTRIES,
+    CONF_POE_BUDGET, DEFAULT_CONF_POE_BUDGET, MAX_POE_BUDGET, MODEL_POE_BUDGET, DEFAULT_POE_BUDGET,
+    POE_HEADROOM_THRESHOLD, POE_HEADROOM_HYSTERESIS, EVENT_POE_HEADROOM, CONTEXT_TOTALS,
+    CONTEXT_DIAGNOSTICS, CONTEXT_STATISTICS, CONTEXT_ENERGY, ENERGY_SAVE_INTERVAL,
+    ENDPOINT_SYSTEM, ENDPOINT_LINK, ENDPOINT_PORT_STATE, ENDPOINT_POE,
+    DATA_SCHEDULER, STORAGE_VERSION, SNAPSHOT_SAVE_DELAY, MODEL_PORT_COUNT, DEFAULT_PORT_COUNT,
+    PATH_LOGIN, PATH_LOGOUT, PATH_LED_CFG, PATH_PORT_STATE_SET,
+)
+from .scheduler import PollScheduler, RequestGate, PRIORITY_WRITE, PRIORITY_POLL
+from .services import async_setup_services
+from .transport import Response, ResponseKind, HttpTransport
+from .parser import DataPage
+from .models import PortState, SwitchStats, PortTotals
+from .breaker import CircuitBreaker, BreakerState
+from .latency import LatencyHistogram
+from .recording import TranscriptRecorder
 
 MAX_HTTP_RETRIES = 3
 MAX_APP_RETRIES = 2
+REQUEST_TIMEOUT = 5
+# Retries wait BACKOFF_BASE_DELAY doubled per attempt up to BACKOFF_MAX_DELAY, with jitter
+BACKOFF_BASE_DELAY = 0.5
+BACKOFF_MAX_DELAY = 4
+# Seconds a poll including all its retries may take
+POLL_TIME_BUDGET = 15
+
+# Deadline of the poll the current task belongs to, writes have none
+_poll_deadline = contextvars.ContextVar("zyxel_poll_deadline", default=None)
+# Priority of the requests made by the current task, writes and what they read back go first
+_request_priority = contextvars.ContextVar("zyxel_request_priority", default=PRIORITY_POLL)
+
+# Port changes arriving within this many seconds are written together
+WRITE_DEBOUNCE_DELAY = 0.25
 CONF_DEVICES = "devices"
 
+SYSTEM_PAGE = DataPage('sys_fmw_ver', 'model_name', 'sys_MAC', 'sys_dev_name', 'sys_led_state', 'system_uptime')
+LINK_PAGE = DataPage('portstatus', 'speed')
+PORT_STATE_PAGE = DataPage('portPoE')
+POE_PAGE = DataPage('port_power')
+
 _LOGGER = logging.getLogger(__name__)
 
 DEVICES_SCHEMA = vol.Schema({
@@ -33,6 +82,14 @@ DEVICES_SCHEMA = vol.Schema({
     vol.Required(CONF_PASSWORD): cv.string,
     vol.Optional(CONF_NAME): cv.string,
     vol.Optional(CONF_SCAN_INTERVAL): vol.All(vol.Coerce(int), vol.Range(min=30, max=300)),
+    vol.Optional(CONF_POWER_SCAN_INTERVAL): vol.All(vol.Coerce(int), vol.Range(min=5, max=300)),
+    vol.Optional(CONF_PARALLEL_REQUESTS): vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_PARALLEL_REQUESTS)),
+    vol.Optional(CONF_OPTIMISTIC): cv.boolean,
+    vol.Optional(CONF_POWER_DEADBAND): vol.All(vol.Coerce(float), vol.Range(min=0, max=10)),
+    vol.Optional(CONF_ADAPTIVE_POLLING): cv.boolean,
+    vol.Optional(CONF_LINK_WATCH_INTERVAL): vol.All(vol.Coerce(int), vol.Range(min=0, max=MAX_LINK_WATCH_INTERVAL)),
+    vol.Optional(CONF_POE_BUDGET): vol.All(vol.Coerce(int), vol.Range(min=0, max=MAX_POE_BUDGET)),
+    vol.Optional(CONF_RECORD_TRANSCRIPT): cv.boolean,
 })
 
 CONFIG_SCHEMA = vol.Schema({
@@ -41,6 +98,8 @@ CONFIG_SCHEMA = vol.Schema({
 
 async def async_setup(hass, config):
     """Set up the Zyxel POE component."""
+    async_setup_services(hass)
+
     conf = config.get(DOMAIN)
     if conf is None:
         return True
@@ -50,12 +109,28 @@ async def async_setup(hass, config):
         name = device_config.get(CONF_NAME)
         password = device_config.get(CONF_PASSWORD)
         interval = device_config.get(CONF_SCAN_INTERVAL)
+        power_interval = device_config.get(CONF_POWER_SCAN_INTERVAL, DEFAULT_POWER_SCAN_INTERVAL)
+        parallel_requests = device_config.get(CONF_PARALLEL_REQUESTS, DEFAULT_PARALLEL_REQUESTS)
+        optimistic = device_config.get(CONF_OPTIMISTIC, DEFAULT_OPTIMISTIC)
+        power_deadband = device_config.get(CONF_POWER_DEADBAND, DEFAULT_POWER_DEADBAND)
+        adaptive_polling = device_config.get(CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING)
+        link_watch_interval = device_config.get(CONF_LINK_WATCH_INTERVAL, DEFAULT_LINK_WATCH_INTERVAL)
+        poe_budget = device_config.get(CONF_POE_BUDGET, DEFAULT_CONF_POE_BUDGET)
+        record_transcript = device_config.get(CONF_RECORD_TRANSCRIPT, DEFAULT_RECORD_TRANSCRIPT)
 
         data = {
             CONF_HOST: host,
             CONF_NAME: name,
             CONF_PASSWORD: password,
-            CONF_SCAN_INTERVAL: interval
+            CONF_SCAN_INTERVAL: interval,
+            CONF_POWER_SCAN_INTERVAL: power_interval,
+            CONF_PARALLEL_REQUESTS: parallel_requests,
+            CONF_OPTIMISTIC: optimistic,
+            CONF_POWER_DEADBAND: power_deadband,
+            CONF_ADAPTIVE_POLLING: adaptive_polling,
+            CONF_LINK_WATCH_INTERVAL: link_watch_interval,
+            CONF_POE_BUDGET: poe_budget,
+            CONF_RECORD_TRANSCRIPT: record_transcript
         }
 
         hass.async_create_task(
@@ -79,11 +154,50 @@ async def async_unload_entry(hass, entry):
         hass.add_job(
             hass.config_entries.async_forward_entry_unload(entry, platform)
         )
-    coordinator = hass.data[KEY_POESWITCH][entry.entry_id]
-    await coordinator.logout()
+    coordinator = hass.data[KEY_POESWITCH].pop(entry.entry_id)
+    await hass.data[KEY_POESWITCH][DATA_SCHEDULER].async_unregister(coordinator)
+    coordinator.async_stop_link_watch()
+    # The session stays logged in so it can be reused when the entry is loaded again
+    await coordinator.async_save_state()
     coordinator.cancel()
+    await coordinator.async_close()
     return True
 
+async def async_remove_entry(hass, entry):
+    host = entry.data.get(CONF_HOST)
+    store = Store(hass, STORAGE_VERSION, _storage_key(host))
+    session = (await store.async_load() or {}).get('session') or {}
+    if session.get('token'):
+        # The switch allows a single session, leaving it logged in locks out the web UI until it expires
+        await _async_logout_session(host, session['token'])
+    await store.async_remove()
+
+async def _async_logout_session(host, token):
+    transport = HttpTransport(host)
+    transport.cookie_jar.update_cookies({'token': token}, URL(f"http://{host}/"))
+    try:
+        await transport.request(METHOD_GET, PATH_LOGOUT, timeout=REQUEST_TIMEOUT, expects_login_page=True)
+        _LOGGER.info(f"Logged out of {host}")
+    except (asyncio.TimeoutError, aiohttp.ClientError) as ex:
+        _LOGGER.info(f"Could not log out of {host}: {ex!r}")
+    finally:
+        await transport.close()
+
+def _storage_key(host):
+    return f"{DOMAIN}.{host}"
+
+def _get_scheduler(hass):
+    data = hass.data.setdefault(KEY_POESWITCH, {})
+    if DATA_SCHEDULER not in data:
+        scheduler = data[DATA_SCHEDULER] = PollScheduler(hass)
+
+        @callback
+        def on_hass_stop(event):
+            scheduler.async_shutdown()
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, on_hass_stop)
+    return data[DATA_SCHEDULER]
+
 async def async_setup_entry(hass, entry):
     host = entry.data.get(CONF_HOST)
     name = entry.data.get(CONF_NAME)
@@ -93,20 +207,41 @@ async def async_setup_entry(hass, entry):
 
     password = entry.data.get(CONF_PASSWORD)
     interval = entry.data.get(CONF_SCAN_INTERVAL)
-
-    _LOGGER.debug(f"Using {interval}s update interval on {name}")
-    coordinator = ZyxelCoordinator(hass, name, host, password, interval)
+    power_interval = entry.data.get(CONF_POWER_SCAN_INTERVAL, DEFAULT_POWER_SCAN_INTERVAL)
+    parallel_requests = entry.data.get(CONF_PARALLEL_REQUESTS, DEFAULT_PARALLEL_REQUESTS)
+    optimistic = entry.data.get(CONF_OPTIMISTIC, DEFAULT_OPTIMISTIC)
+    power_deadband = entry.data.get(CONF_POWER_DEADBAND, DEFAULT_POWER_DEADBAND)
+    adaptive_polling = entry.data.get(CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING)
+    link_watch_interval = entry.data.get(CONF_LINK_WATCH_INTERVAL, DEFAULT_LINK_WATCH_INTERVAL)
+    poe_budget = entry.data.get(CONF_POE_BUDGET, DEFAULT_CONF_POE_BUDGET)
+    transcript = None
+    # Recording can be turned on and off in the options after the switch was added
+    if entry.options.get(CONF_RECORD_TRANSCRIPT, entry.data.get(CONF_RECORD_TRANSCRIPT, DEFAULT_RECORD_TRANSCRIPT)):
+        transcript = hass.config.path(DOMAIN, f"{host.replace(':', '_')}.jsonl")
+        _LOGGER.warning(f"Recording the requests to {name} in {transcript}")
+
+    _LOGGER.debug(f"Using {interval}s update interval, {power_interval}s power update interval and {parallel_requests} parallel requests on {name}")
+    scheduler = _get_scheduler(hass)
+    coordinator = ZyxelCoordinator(hass, name, host, password, interval, power_interval, parallel_requests, scheduler, optimistic=optimistic, power_deadband=power_deadband, adaptive_polling=adaptive_polling, link_watch_interval=link_watch_interval, poe_budget=poe_budget, transcript=transcript)
 
     async def on_hass_stop(event):
-        """Close connection when hass stops."""
-        try:
-            await coordinator.logout()
-        except:
-            pass
+        """Keep the session and snapshot when hass stops so they can be reused after the restart."""
+        await coordinator.async_save_state()
+        await coordinator.async_close()
 
     coordinator.cancel = hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, on_hass_stop)
 
-    await coordinator.async_config_entry_first_refresh()
+    await coordinator.async_load_state()
+    # Entities are created from the snapshot, the scheduler reads the switch without holding up the startup
+    restored = bool(coordinator.device_info)
+    if not restored:
+        # The first setup needs the model to know the ports
+        try:
+            await coordinator.async_config_entry_first_refresh()
+        except Exception:
+            coordinator.cancel()
+            await coordinator.async_close()
+            raise
 
     dev_reg = dr.async_get(hass)
 
@@ -121,11 +256,17 @@ async def async_setup_entry(hass, entry):
                 model=coordinator.device_info['model'],
                 sw_version=coordinator.device_info['sw_version']
             )
-    hass.data.setdefault(KEY_POESWITCH, {})[entry.entry_id] = coordinator
+    hass.data[KEY_POESWITCH][entry.entry_id] = coordinator
+    scheduler.async_register(coordinator, refresh_now=restored)
+    coordinator.async_start_link_watch()
+    entry.async_on_unload(entry.add_update_listener(_async_options_updated))
     hass.async_create_task(hass.config_entries.async_forward_entry_setups(entry, FORWARD_PLATFORMS))
 
     return True
 
+async def _async_options_updated(hass, entry):
+    await hass.config_entries.async_reload(entry.entry_id)
+
 # Generate a random number
 def random_str():
     random_str_arr = ['0','1','2','3','4','5','6','7','8','9',
@@ -153,6 +294,20 @@ def encode(_input):
 
     return pwd_final_str
 
+def backoff_delay(attempt):
+    """Delay before retry number attempt (from 1), exponential with jitter."""
+    delay = min(BACKOFF_MAX_DELAY, BACKOFF_BASE_DELAY * 2 ** (attempt - 1))
+    return delay / 2 + random() * delay / 2
+
+@contextmanager
+def _write_priority():
+    """Send the requests made in this block ahead of polls."""
+    token = _request_priority.set(PRIORITY_WRITE)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
 def int_to_bool_list(num):
     return [bool(num & (1<<n)) for n in range(4)]
 
@@ -160,78 +315,152 @@ def bool_list_to_int(bools):
     return int(''.join(str(int(i)) for i in reversed(bools)), 2)
 
 class ZyxelCoordinator(DataUpdateCoordinator):
-    def __init__(self, hass, name, host, password, interval):
+    def __init__(self, hass, name, host, password, interval, power_interval=DEFAULT_POWER_SCAN_INTERVAL, parallel_requests=DEFAULT_PARALLEL_REQUESTS, scheduler=None, optimistic=DEFAULT_OPTIMISTIC, power_deadband=DEFAULT_POWER_DEADBAND, adaptive_polling=DEFAULT_ADAPTIVE_POLLING, link_watch_interval=DEFAULT_LINK_WATCH_INTERVAL, poe_budget=DEFAULT_CONF_POE_BUDGET, transport=None, transcript=None):
+        # Every endpoint is refreshed on its own schedule, the coordinator ticks at the fastest one
+        self.endpoint_intervals = {
+            ENDPOINT_POE: power_interval,
+            ENDPOINT_LINK: max(power_interval, min(LINK_SCAN_INTERVAL, interval)),
+            ENDPOINT_PORT_STATE: interval,
+            ENDPOINT_SYSTEM: max(interval, SYSTEM_SCAN_INTERVAL),
+        }
+        # With adaptive polling power and link state are refreshed at an interval between
+        # ADAPTIVE_MIN_INTERVAL after activity and the update interval when idle
+        self.adaptive_interval = interval if adaptive_polling else None
+        self._activity = False
+        # Link changes between polls are caught by fetching only the link page at this interval
+        self._link_watch_interval = link_watch_interval
+        self._unsub_link_watch = None
+        self._watching_links = False
+        self._polling = False
+        self.poll_interval = timedelta(seconds=min(self._endpoint_interval(endpoint) for endpoint in self.endpoint_intervals))
+
+        # Polls are triggered by the fleet wide scheduler instead of a timer per switch
         super().__init__(
             hass,
             _LOGGER,
             name="Zyxel POE",
-            update_interval=timedelta(seconds=interval),
+            update_interval=None,
         )
 
-        self.ports = {}
+        # Sized once from the model when the system info is first loaded
+        self.ports = []
+        # Sums over the ports, kept up to date from the changes of single ports
+        self.totals = PortTotals()
+        self._notified_totals = None
+        self._poe_budget = poe_budget
+        self.headroom_low = False
         self.device_info = {}
         self.led_eco_state = STATE_OFF
-        self._client = async_create_clientsession(hass, cookie_jar=aiohttp.CookieJar(unsafe=True))
+        # A replay transport can stand in for the switch when profiling
+        self._transport = transport or HttpTransport(host, parallel_requests)
+        # Requests and responses are written to this transcript when set
+        self._recorder = TranscriptRecorder(transcript) if transcript else None
+        self._store = Store(hass, STORAGE_VERSION, _storage_key(host))
+        # Token of the current login session, when it was created and how long an unused session was seen to survive
+        self._session = {}
+        # Unused time and least uptime of a restored session the switch rejected, to learn its lifetime from
+        self._rejected_session = None
+        self.login_count = 0
+        self.stats = SwitchStats()
+        self.last_login_duration = None
 
         _LOGGER.info(f"Created coordinator with name: {name}")
         self.name = name
         self.host = host
         self._password = password
+        self._scheduler = scheduler
+        self.breaker = CircuitBreaker()
+        # Per requested path
+        self.latencies = {}
+        # Switch entities show a requested state before the switch confirmed it
+        self.optimistic = optimistic
+        # Power changes smaller than this many watts are not written to the state machine
+        self._power_deadband = power_deadband
+        self._energy_saved_at = time.monotonic()
+
+        self._write_lock = asyncio.Lock()
+        self._queued_port_states = {}
+        self._queued_futures = {}
+        self._flush_handle = None
+
+        # Seconds spent in each endpoint fetch during the last poll cycle
+        self.stage_durations = {}
+        # Endpoints fetched successfully since listeners were last notified
+        self.refreshed_endpoints = set()
+        self.availability_changed = False
+        self._notified_success = True
+        self._diagnostics_changed = False
+        self._last_fetched = {}
+        # Endpoints never fetched yet, the ports and their entities are only known once all were loaded
+        self._unloaded = set(self.endpoint_intervals)
+        # Login in progress, concurrent fetches wait for its result instead of logging in themselves
+        self._login_future = None
+        # Requests to the switch go through the gate, identical GETs in flight share one request
+        self._gate = RequestGate(parallel_requests)
+        self._inflight_gets = {}
+        self._write_generation = 0
+        self.coalesced_requests = 0
+        self._poll_semaphore = asyncio.Semaphore(parallel_requests)
+        self._fetchers = {
+            ENDPOINT_PORT_STATE: self._fetch_poe_port_state,
+            ENDPOINT_POE: self._fetch_poe_port_power,
+            ENDPOINT_SYSTEM: self._fetch_system_info,
+            ENDPOINT_LINK: self._fetch_link_info,
+        }
 
-    async def _fetch_system_info(self):
+    async def _fetch_values(self, endpoint, page):
+        """Fetch a data page and return its parsed values when all expected values are present."""
         if not await self._login():
-            return False
+            return None
 
-        ok, text = await self.execute(METHOD_GET, f"http://{self.host}/system_data.js")
-        if not ok:
-            return False
+        response = await self.execute(METHOD_GET, endpoint)
+        if not response.ok:
+            return None
 
-        m = re.findall(r"sys_fmw_ver\s?=\s?'(.+)';", text)
-        if not m or len(m) < 1:
-            _LOGGER.info(f"Unexpected response received system info retrieval of sw_version: {text}")
-            return False
-        sw_version = m[0]
+        values = page.parse(response.text)
+        missing = [name for name in page.names if name not in values]
+        if missing:
+            _LOGGER.info(f"Unexpected response received during retrieval of {', '.join(missing)}: {response.text}")
+            return None
+        return values
 
-        m = re.findall(r"model_name\s?=\s?'(.+)';", text)
-        if not m or len(m) < 1:
-            _LOGGER.info(f"Unexpected response received system info retrieval of model: {text}")
+    async def _fetch_system_info(self):
+        values = await self._fetch_values(ENDPOINT_SYSTEM, SYSTEM_PAGE)
+        if values is None:
             return False
-        model = m[0]
 
-        m = re.findall(r"sys_MAC\s?=\s?'(.+)';", text)
-        if not m or len(m) < 1:
-            _LOGGER.info(f"Unexpected response received system info retrieval of MAC: {text}")
-            return False
-        mac = m[0]
+        sys_led_state = STATE_ON if str(values['sys_led_state']) == '1' else STATE_OFF
+        sys_uptime = int(values['system_uptime'])
+        if self._rejected_session is not None:
+            self._learn_session_lifetime(sys_uptime)
 
-        m = re.findall(r"sys_dev_name\s?=\s?'(.+)';", text)
-        if not m or len(m) < 1:
-            _LOGGER.info(f"Unexpected response received system info retrieval of name: {text}")
-            return False
-        name = m[0]
+        # Name, MAC, model and firmware cannot change while the switch keeps running
+        if self.device_info and sys_uptime >= self.device_info['sys_uptime']:
+            self.device_info['sys_led_state'] = sys_led_state
+            self.device_info['sys_uptime'] = sys_uptime
+            return True
 
-        m = re.findall(r"sys_led_state\s?=\s?'(.+)';", text)
-        if not m or len(m) < 1:
-            _LOGGER.info(f"Unexpected response received system info retrieval of led state: {text}")
-            return False
-        sys_led_state = STATE_ON if m[0] == '1' else STATE_OFF
+        if self.device_info:
+            _LOGGER.info(f"Uptime of {self.name} went backwards, reloading system info")
 
-        m = re.findall(r"system_uptime\s?=\s?'(.+)';", text)
-        if not m or len(m) < 1:
-            _LOGGER.info(f"Unexpected response received system info retrieval of uptime: {text}")
-            return False
-        sys_uptime = int(m[0])
+        count = self._port_count(values['model_name'])
+        if len(self.ports) != count:
+            if self.ports:
+                _LOGGER.warning(f"{self.name} now has {count} ports instead of {len(self.ports)}, reload the integration to update its entities")
+            self.ports = [PortState(i) for i in range(count)]
+            self.totals = PortTotals()
 
         self.device_info = {
-            'name': name,
-            'mac': mac,
-            'sw_version': sw_version,
-            'model': model,
+            'name': values['sys_dev_name'],
+            'mac': values['sys_MAC'],
+            'sw_version': values['sys_fmw_ver'],
+            'model': values['model_name'],
             'sys_led_state': sys_led_state,
             'sys_uptime': sys_uptime
         }
 
         _LOGGER.info(f"System info: {self.device_info}")
+        self._async_schedule_save()
         return True
 
     def get_led_eco_switch_state(self):
@@ -244,122 +473,384 @@ class ZyxelCoordinator(DataUpdateCoordinator):
         return self.device_info.get('sys_uptime', 0)
 
     def get_port_power(self, port):
-        p = self.ports.get(port)
-        if p:
-            return p.get('power', 0)
-        return 0
+        return self.ports[port].power
 
     def get_port_state(self, port):
-        p = self.ports.get(port)
-        if p:
-            return p.get('state', STATE_ON)
-        return STATE_ON
+        return STATE_ON if self.ports[port].poe_enabled else STATE_OFF
 
     def get_port_link_state(self, port):
-        p = self.ports.get(port)
-        if p:
-            return p.get('link_state', STATE_OFF)
-        return STATE_OFF
+        return STATE_ON if self.ports[port].link_up else STATE_OFF
 
     def get_port_link_speed(self, port):
-        p = self.ports.get(port)
-        if p:
-            return p.get('speed', '')
-        return ''
+        return self.ports[port].speed
+
+    @property
+    def poe_budget(self):
+        if self._poe_budget:
+            return self._poe_budget
+        model = self.device_info.get('model', '')
+        return next((budget for name, budget in MODEL_POE_BUDGET.items() if name in model), DEFAULT_POE_BUDGET)
+
+    @property
+    def poe_headroom(self):
+        return round(self.poe_budget - self.totals.power, 1)
+
+    def _check_headroom(self):
+        headroom = self.poe_headroom
+        if self.headroom_low:
+            low = headroom < POE_HEADROOM_THRESHOLD + POE_HEADROOM_HYSTERESIS
+        else:
+            low = headroom < POE_HEADROOM_THRESHOLD
+        if low == self.headroom_low:
+            return
+        self.headroom_low = low
+        _LOGGER.info(f"POE headroom of {self.name} is {'low' if low else 'back'} at {headroom}W")
+        self.hass.bus.async_fire(EVENT_POE_HEADROOM, {
+            'host': self.host,
+            'name': self.name,
+            'low': low,
+            'headroom': headroom,
+            'budget': self.poe_budget,
+            'power': round(self.totals.power, 1),
+            'threshold': POE_HEADROOM_THRESHOLD,
+        })
+
+    def get_port_energy(self, port):
+        return self.ports[port].history.energy
+
+    def get_port_power_stats(self, port):
+        """Minimum, maximum and mean of the power readings kept for the port."""
+        history = self.ports[port].history
+        if not len(history):
+            return {'power_min': None, 'power_max': None, 'power_mean': None, 'power_window': 0}
+        # The history keeps float32 values, they are rounded to drop the conversion error
+        return {
+            'power_min': round(history.minimum(), 2),
+            'power_max': round(history.maximum(), 2),
+            'power_mean': round(history.mean(), 2),
+            'power_window': round(history.span()),
+        }
+
+    def get_port_changes(self, port):
+        """Fields of the port that changed during the last refresh."""
+        return self.ports[port].changed
 
     def set_port_state(self, port, state):
-        p = self.ports.get(port)
-        if not p:
-            self.ports[port] = {}
-        self.ports[port]['state'] = state
+        self.ports[port].update('poe_enabled', state == STATE_ON)
 
     def poe_ports(self):
-        return [p for p in self.ports.values() if p.get('is_poe_port', False)]
+        return [p for p in self.ports if p.is_poe_port]
+
+    def _port_count(self, model):
+        count = next((count for name, count in MODEL_PORT_COUNT.items() if name in model), None)
+        if count is None:
+            _LOGGER.warning(f"Unknown model {model}, assuming {DEFAULT_PORT_COUNT} ports")
+            count = DEFAULT_PORT_COUNT
+        return count
+
+    def _request_slot(self):
+        if self._scheduler is None:
+            return nullcontext()
+        return self._scheduler.request_slot(self)
+
+    @property
+    def schedule_lag(self):
+        """Seconds the last poll ran behind its scheduled start."""
+        if self._scheduler is None:
+            return 0.0
+        return self._scheduler.lag(self)
+
+    async def execute(self, method, path, data=None):
+        if method != METHOD_GET:
+            # GETs sent before or during a write must not be shared with those after it
+            self._write_generation += 1
+            try:
+                return await self._execute(method, path, data)
+            finally:
+                self._write_generation += 1
+
+        key = (path, self._write_generation)
+        task = self._inflight_gets.get(key)
+        if task is None:
+            task = self.hass.loop.create_task(self._execute(method, path))
+            self._inflight_gets[key] = task
+            task.add_done_callback(partial(self._forget_get, key))
+        else:
+            _LOGGER.debug(f"Joining GET {path} already in flight")
+            self.coalesced_requests += 1
 
-    async def execute(self, method, url, data=None):
+        try:
+            # The request keeps running for the others sharing it when one of them is cancelled
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if task.cancelled():
+                return Response(ResponseKind.TRANSIENT)
+            raise
+
+    def _forget_get(self, key, task):
+        if self._inflight_gets.get(key) is task:
+            del self._inflight_gets[key]
+
+    async def _execute(self, method, path, data=None):
+        url = f"http://{self.host}/{path}"
+        priority = PRIORITY_WRITE if method != METHOD_GET else _request_priority.get()
         _LOGGER.info(f"Executing {method} on {url} with data {data}")
+        response = Response(ResponseKind.TRANSIENT)
         for i in range(MAX_HTTP_RETRIES):
-            try:
-                if i != 0:
-                    _LOGGER.info(f"Retry {method} {url} ({i} out of {MAX_HTTP_RETRIES})")
-                    await asyncio.sleep(2)
-
-                if method == METHOD_GET:
-                    resp = await self._client.get(url, timeout=5)
-                else:
-                    resp = await self._client.post(url, data=data, timeout=5)
-
-                _LOGGER.debug(f"{method} {url} returned status code: {resp.status}")
-                if not resp.ok:
-                    _LOGGER.info("Failed. retrying")
-                    continue
-                text = await resp.text()
-                if not "login.cgi" in url and not "logout.html" in url and re.search(r'action="login.cgi"', text):
-                    _LOGGER.info("Login required. retrying")
-                    self._clear_login_cookie()
-                    return False, text
-
-                return True, text
+            if i != 0:
+                _LOGGER.info(f"Retry {method} {url} ({i} out of {MAX_HTTP_RETRIES})")
+                self.stats.request_retries += 1
+                if not await self._async_backoff(i):
+                    break
+
+            latency = self.latencies.setdefault(path, LatencyHistogram())
+            timeout = min(latency.timeout(REQUEST_TIMEOUT), self._poll_time_left())
+            if timeout <= 0:
+                _LOGGER.info(f"No time left in this poll for {method} {url}")
+                break
 
+            try:
+                async with self._gate.slot(priority), self._request_slot():
+                    # Only a login failure of the token sent may clear the cookies
+                    token = self._get_login_token()
+                    start = time.monotonic()
+                    try:
+                        response = await self._transport.request(method, path, data, timeout, path in (PATH_LOGIN, PATH_LOGOUT))
+                    except asyncio.TimeoutError:
+                        latency.record(timeout, timed_out=True)
+                        self._record(method, path, data, timeout, token, error="timeout")
+                        raise
+                    except aiohttp.ClientError as ex:
+                        self._record(method, path, data, time.monotonic() - start, token, error=repr(ex))
+                        raise
+                    elapsed = time.monotonic() - start
+                    latency.record(elapsed)
+                    self._record(method, path, data, elapsed, token, response)
             except (asyncio.TimeoutError, aiohttp.ClientError) as ex:
-                _LOGGER.info(f"Error during {method} {url}: {ex}")
-
-        return False, None
+                _LOGGER.info(f"Error during {method} {url} after at most {timeout:.2f}s: {ex!r}")
+                response = Response(ResponseKind.TRANSIENT)
+                continue
+
+            _LOGGER.debug(f"{method} {url} returned status code: {response.status} ({response.kind.value})")
+
+            if response.kind is ResponseKind.OK:
+                # The restored session is known to be valid from here on
+                if self._session.pop('restored', None):
+                    self._session_reused()
+                return response
+
+            if response.kind is ResponseKind.AUTH_REQUIRED:
+                _LOGGER.info("Login required. retrying")
+                self.stats.auth_failures += 1
+                self._clear_login_cookie(token)
+                return response
+
+            if response.kind is ResponseKind.FATAL:
+                _LOGGER.info(f"Request rejected with status code {response.status}")
+                return response
+
+            _LOGGER.info("Failed. retrying")
+
+        return response
+
+    def _record(self, method, path, data, elapsed, token, response=None, error=None):
+        if self._recorder is None:
+            return
+        new_token = self._get_login_token()
+        self._recorder.record(
+            method, path, data, elapsed, response, error,
+            tokens=(token, new_token), login=new_token is not None and new_token != token,
+        )
+        if self._recorder.pending >= TRANSCRIPT_FLUSH_ENTRIES:
+            self.hass.async_add_executor_job(self._recorder.write, self._recorder.take())
 
     async def logout(self):
         _LOGGER.info("Logging out")
-        await self.execute(METHOD_GET, f"http://{self.host}/logout.html")
+        await self.execute(METHOD_GET, PATH_LOGOUT)
+
+    def _get_login_token(self):
+        for c in self._transport.cookie_jar:
+            if c.key == 'token':
+                return c.value
+        return None
 
     def _have_login_cookie(self):
-        if 'token' in [c.key for c in self._client.cookie_jar]:
+        if self._get_login_token() is not None:
             _LOGGER.debug("Cookie contains a login token")
             return True
         return False
 
-    def _clear_login_cookie(self):
+    def _clear_login_cookie(self, token):
+        if self._get_login_token() != token:
+            _LOGGER.debug("Logged in again since the request was sent, keeping the new login")
+            return
         _LOGGER.debug("Login cookie no longer valid. Clearing cookies")
-        self._client.cookie_jar.clear()
+        self._transport.cookie_jar.clear()
+        if self._session.get('restored'):
+            # A reboot, a logout in the web UI or a new entry end a session as well, it is only
+            # taken as expired when the uptime on the next system page shows no reboot
+            unused = time.time() - self._session['last_used']
+            self._rejected_session = (unused, self.get_uptime() + int(unused))
+            _LOGGER.info(f"Stored session rejected after being unused for {unused:.0f}s")
+        self._session = {'lifetime': self._session.get('lifetime')}
+
+    def _session_reused(self):
+        unused = time.time() - self._session['last_used']
+        lifetime = self._session.get('lifetime')
+        if lifetime is not None and unused >= lifetime:
+            _LOGGER.info(f"Stored session still valid after being unused for {unused:.0f}s, forgetting the lifetime of {lifetime:.0f}s")
+            self._session['lifetime'] = None
+
+    def _learn_session_lifetime(self, sys_uptime):
+        unused, least_uptime = self._rejected_session
+        self._rejected_session = None
+        if sys_uptime < least_uptime:
+            _LOGGER.debug(f"{self.name} rebooted while the stored session was unused, its lifetime is not learned")
+            return
+        lifetime = self._session.get('lifetime')
+        self._session['lifetime'] = unused if lifetime is None else min(lifetime, unused)
+        _LOGGER.debug(f"Sessions of {self.name} expire after being unused for at most {self._session['lifetime']:.0f}s")
+        self._async_schedule_save()
+
+    @property
+    def session_lifetime(self):
+        """Seconds an unused session was seen to expire after, None while unknown."""
+        return self._session.get('lifetime')
+
+    async def async_load_state(self):
+        """Restore the snapshot and login session stored before the last restart or reload."""
+        data = await self._store.async_load() or {}
+        snapshot = data.get('snapshot')
+        if snapshot and not self.device_info:
+            self.device_info = snapshot['device_info']
+            self.ports = [PortState.from_snapshot(port) for port in snapshot['ports']]
+            self.totals = PortTotals.of(self.ports)
+            _LOGGER.debug(f"Restored {self.name} with {len(self.ports)} ports from snapshot")
+
+        session = data.get('session')
+        if not session or not session.get('token'):
+            return
+
+        self._session = session
+        unused = time.time() - session['last_used']
+        lifetime = session.get('lifetime')
+        # Trying the token costs one request, logging in while it is still valid locks the switch out
+        if lifetime is not None and unused >= lifetime:
+            _LOGGER.debug(f"Stored session unused for {unused:.0f}s, sessions expired after {lifetime:.0f}s before, trying it once")
+        else:
+            _LOGGER.debug(f"Reusing session stored {unused:.0f}s ago")
+        self._transport.cookie_jar.update_cookies({'token': session['token']}, URL(f"http://{self.host}/"))
+        self._session['restored'] = True
+
+    async def async_close(self):
+        if self._recorder is not None and self._recorder.pending:
+            await self.hass.async_add_executor_job(self._recorder.write, self._recorder.take())
+        # Shared GETs keep running when their poll is cancelled, they must not use the closed transport
+        for task in list(self._inflight_gets.values()):
+            task.cancel()
+        await self._transport.close()
+
+    def transport_stats(self):
+        return {
+            **self._transport.stats(),
+            'coalesced_requests': self.coalesced_requests,
+            'waiting_requests': self._gate.waiting,
+        }
+
+    def _state_data(self):
+        data = {
+            'session': {
+                'token': self._get_login_token(),
+                'login_time': self._session.get('login_time'),
+                'last_used': time.time(),
+                'lifetime': self._session.get('lifetime'),
+            },
+        }
+        if self.device_info:
+            data['snapshot'] = {
+                'device_info': self.device_info,
+                'ports': [port.snapshot() for port in self.ports],
+            }
+        return data
+
+    async def async_save_state(self):
+        await self._store.async_save(self._state_data())
+
+    @callback
+    def _async_schedule_save(self):
+        self._store.async_delay_save(self._state_data, SNAPSHOT_SAVE_DELAY)
 
     async def _login(self):
         if self._have_login_cookie():
             _LOGGER.debug("Login token should still be valid")
             return True
 
+        # Concurrent fetches must not race each other into the single login session,
+        # and a failed login is not repeated by every fetch that waited for it
+        if self._login_future is not None:
+            return await asyncio.shield(self._login_future)
+
+        self._login_future = self.hass.loop.create_future()
+        self.login_count += 1
+        start = time.monotonic()
+        logged_in = False
+        try:
+            logged_in = await self._do_login()
+            return logged_in
+        finally:
+            self._login_future.set_result(logged_in)
+            self._login_future = None
+            self.last_login_duration = time.monotonic() - start
+            _LOGGER.debug(f"Login {self.login_count} took {self.last_login_duration:.3f}s")
+
+    async def _do_login(self):
         _LOGGER.debug("Logging in")
 
         login_data = {
             "password": encode(self._password),
         }
 
-        ok, text = await self.execute(METHOD_POST, f"http://{self.host}/login.cgi", data=login_data)
-        if not ok:
+        response = await self.execute(METHOD_POST, PATH_LOGIN, data=login_data)
+        if not response.ok:
             _LOGGER.debug("Login failed")
             return False
 
         if self._have_login_cookie():
             _LOGGER.info("Logged in successfully")
+            self._session = {'login_time': time.time(), 'lifetime': self._session.get('lifetime')}
+            await self.async_save_state()
+            # A new session is needed after a reboot, so check the uptime on the next refresh
+            self.invalidate_endpoint(ENDPOINT_SYSTEM)
             return True
 
-        if text is not None and "logged in already" in text:
+        text = response.text
+        if "logged in already" in text:
             _LOGGER.info("Other login session is still active")
         else:
             _LOGGER.info(f"Unknown error during login: {text}")
 
+        self.stats.auth_failures += 1
         _LOGGER.debug("Login failed")
         return False
 
-    async def _do_change_state(self):
+    async def _do_change_led_state(self):
         if not await self._login():
             return False
 
-        if self.device_info.get("sys_led_state", STATE_OFF) != self.led_eco_state:
-            ok, _ = await self.execute(METHOD_POST, f"http://{self.host}/led_cfg.cgi", {"led_state_f": 0 if self.led_eco_state == STATE_OFF else 1})
-            if not ok:
-                _LOGGER.warning("Failed to change LED ECO state")
-                return False
-            return True
+        response = await self.execute(METHOD_POST, PATH_LED_CFG, {"led_state_f": 0 if self.led_eco_state == STATE_OFF else 1})
+        if not response.ok:
+            _LOGGER.warning("Failed to change LED ECO state")
+            return False
+        self.device_info['sys_led_state'] = self.led_eco_state
+        self.invalidate_endpoint(ENDPOINT_SYSTEM)
+        return True
+
+    async def _do_change_port_states(self, port_states):
+        if not await self._login():
+            return False
 
-        switches = [True if o.get("state", STATE_ON) == STATE_ON else False for o in self.poe_ports()]
+        # Ports without a queued change keep their current state
+        switches = [port_states.get(p.index, self.get_port_state(p.index)) == STATE_ON for p in self.poe_ports()]
 
         data = {
             "g_port_flwcl": 0,
@@ -382,111 +873,395 @@ class ZyxelCoordinator(DataUpdateCoordinator):
             _LOGGER.error(f"Unknown model: {self.device_info['model']}")
             return False
 
-        ok, _ = await self.execute(METHOD_POST, f"http://{self.host}/port_state_set.cgi", data=data)
-        if not ok:
+        response = await self.execute(METHOD_POST, PATH_PORT_STATE_SET, data=data)
+        if not response.ok:
             _LOGGER.warning("Failed to change port state")
             return False
 
         _LOGGER.debug("State change successful")
+        for port, state in port_states.items():
+            self.set_port_state(port, state)
+        self.invalidate_endpoint(ENDPOINT_PORT_STATE)
         return True
 
-    async def change_state(self):
+    async def _change_with_retries(self, change, *args):
         for i in range(MAX_APP_RETRIES):
-            if await self._do_change_state():
+            if await change(*args):
                 return
             _LOGGER.info("Retry changing state")
-            if i < MAX_APP_RETRIES:
-                await asyncio.sleep(2)
+            if i < MAX_APP_RETRIES - 1:
+                self.stats.write_retries += 1
+                await self._async_backoff(i + 1)
         raise UpdateFailed("Failed to change state")
 
-    async def _fetch_link_info(self):
-        if not await self._login():
-            return False
+    def _poll_time_left(self):
+        deadline = _poll_deadline.get()
+        if deadline is None:
+            return REQUEST_TIMEOUT
+        return deadline - time.monotonic()
 
-        ok, text = await self.execute(METHOD_GET, f"http://{self.host}/link_data.js")
-        if not ok:
-            return False
+    def latency_stats(self):
+        return {path: latency.as_dict(REQUEST_TIMEOUT) for path, latency in self.latencies.items()}
 
-        m = re.findall(r"portstatus\s?=\s?\[(.+)\];", text)
-        if not m or len(m) < 1:
-            _LOGGER.info(f"Unexpected response received during port status retrieval: {text}")
+    async def _async_backoff(self, attempt):
+        """Wait before a retry, returns False when the poll has no time left for it."""
+        delay = backoff_delay(attempt)
+        deadline = _poll_deadline.get()
+        if deadline is not None and time.monotonic() + delay >= deadline:
             return False
+        await asyncio.sleep(delay)
+        return True
 
-        states = [x.strip().replace("'", "") for x in m[0].split(',')]
-        for i, state in enumerate(states):
-            if not self.ports.get(i):
-                self.ports[i] = {}
-            self.ports[i]["link_state"] = STATE_ON if state == 'Up' else STATE_OFF
-            _LOGGER.debug(f"Port {i} link state {self.ports[i]["link_state"]} ({state} {state == 'Up'})")
+    async def change_led_state(self):
+        with _write_priority():
+            async with self._write_lock:
+                await self._change_with_retries(self._do_change_led_state)
+            await self._async_read_back(ENDPOINT_SYSTEM)
+
+    async def _async_read_back(self, endpoint):
+        """Re-read a single endpoint, like the one changed by a write, and notify its entities.
+
+        Changes collected by a poll running at the same time are notified
+        along with it, they are not lost.
+        """
+        # Only the gate limits a read back, so it is not queued behind the stages of a running poll
+        if not await self._fetch_stage(endpoint, nullcontext()):
+            _LOGGER.info(f"Failed to read back {endpoint}")
+            return False
+        self._mark_fetched(endpoint)
+        self.refreshed_endpoints.add(endpoint)
+        self.async_update_listeners()
+        return True
 
+    def queue_port_state(self, port, state):
+        """Queue a POE state change of a port.
+
+        Changes queued within WRITE_DEBOUNCE_DELAY are written with a single
+        request. The returned future is resolved once the change of this port
+        was written and read back from the switch.
+        """
+        future = self.hass.loop.create_future()
+        self._queued_port_states[port] = state
+        self._queued_futures.setdefault(port, []).append(future)
+        if self._flush_handle is None:
+            self._flush_handle = self.hass.loop.call_later(WRITE_DEBOUNCE_DELAY, self._async_flush_port_states)
+        return future
+
+    async def async_set_port_state(self, port, state):
+        await self.queue_port_state(port, state)
+
+    async def _async_set_port_states(self, ports, state):
+        """Change several ports with one write, returns the error of every port that failed."""
+        futures = [self.queue_port_state(port, state) for port in ports]
+        outcomes = await asyncio.gather(*futures, return_exceptions=True)
+        return {port: str(outcome) or type(outcome).__name__ for port, outcome in zip(ports, outcomes) if isinstance(outcome, Exception)}
+
+    async def async_power_cycle(self, ports, off_time):
+        """Turn ports off and on again, all ports with a single write per phase.
+
+        Ports that are off are left alone. Returns the result of every port.
+        """
+        results = {port: {'result': 'skipped', 'error': 'Port is off'} for port in ports if self.get_port_state(port) != STATE_ON}
+        ports = [port for port in ports if port not in results]
+        _LOGGER.info(f"Power cycling ports {ports} of {self.name}")
+
+        errors = await self._async_set_port_states(ports, STATE_OFF)
+        ports = [port for port in ports if port not in errors]
+        if ports:
+            await asyncio.sleep(off_time)
+            errors.update(await self._async_set_port_states(ports, STATE_ON))
+
+        for port, error in errors.items():
+            results[port] = {'result': 'failed', 'error': error}
+        for port in ports:
+            results.setdefault(port, {'result': 'cycled'})
+        return results
+
+    @callback
+    def _async_flush_port_states(self):
+        self._flush_handle = None
+        port_states, futures = self._queued_port_states, self._queued_futures
+        self._queued_port_states, self._queued_futures = {}, {}
+        self.hass.async_create_task(self._write_port_states(port_states, futures))
+
+    async def _write_port_states(self, port_states, futures):
+        _LOGGER.debug(f"Writing queued port states {port_states}")
+        # Watch the effect of a user change closely
+        self._activity = True
+        self._adapt_poll_interval()
+        try:
+            with _write_priority():
+                async with self._write_lock:
+                    await self._change_with_retries(self._do_change_port_states, port_states)
+                # A single read back of the port states verifies all ports changed by the write
+                if not await self._async_read_back(ENDPOINT_PORT_STATE):
+                    raise UpdateFailed("Could not read back the port states to confirm the change")
+        except Exception as err:
+            for port_futures in futures.values():
+                for future in port_futures:
+                    if not future.done():
+                        future.set_exception(err)
+            return
+
+        for port, port_futures in futures.items():
+            err = None
+            if self.get_port_state(port) != port_states[port]:
+                err = UpdateFailed(f"Port {port} did not change to {port_states[port]}")
+            for future in port_futures:
+                if future.done():
+                    continue
+                if err:
+                    future.set_exception(err)
+                else:
+                    future.set_result(None)
 
-        m = re.findall(r"speed\s?=\s?\[(.+)\];", text)
-        if not m or len(m) < 1:
-            _LOGGER.info(f"Unexpected response received during port speed retrieval: {text}")
+    async def _fetch_link_info(self):
+        values = await self._fetch_values(ENDPOINT_LINK, LINK_PAGE)
+        if values is None:
             return False
 
-        speeds = [x.strip().replace("'", "") for x in m[0].split(',')]
-        for i, speed in enumerate(speeds):
-            _LOGGER.debug(f"Port {i} link speed {speed}")
-            if not self.ports.get(i):
-                self.ports[i] = {}
-            self.ports[i]["speed"] = speed
+        # The first values loaded are not activity
+        watching = ENDPOINT_LINK in self._last_fetched
+        now = dt_util.utcnow()
+        for port, state, speed in zip(self.ports, values['portstatus'], values['speed']):
+            _LOGGER.debug(f"Port {port.index} link state {state} speed {speed}")
+            link_up, speed = state == 'Up', str(speed)
+            if port.link_up != link_up:
+                self.totals.link_changed(port.link_up, link_up)
+            if watching and (port.link_up != link_up or port.speed != speed):
+                if port.link_up != link_up:
+                    self._activity = True
+                self.hass.bus.async_fire(EVENT_LINK_CHANGED, {
+                    'host': self.host,
+                    'name': self.name,
+                    'port': port.index,
+                    'link_up': link_up,
+                    'speed': speed,
+                    'previous_link_up': port.link_up,
+                    'previous_speed': port.speed,
+                    'timestamp': now.isoformat(),
+                })
+            port.update('link_up', link_up)
+            port.update('speed', speed)
 
         return True
 
     async def _fetch_poe_port_state(self):
-        if not await self._login():
-            return False
-
-        ok, text = await self.execute(METHOD_GET, f"http://{self.host}/port_state_data.js")
-        if not ok:
+        values = await self._fetch_values(ENDPOINT_PORT_STATE, PORT_STATE_PAGE)
+        if values is None:
             return False
 
-        m = re.findall(r"portPoE\s?=\s?'(\d+)';", text)
-        if not m or len(m) < 1:
-            _LOGGER.info(f"Unexpected response received during update state: {text}")
-            return False
-
-        switches = int_to_bool_list(int(m[0]))
-        for i, val in enumerate(switches):
-            _LOGGER.debug(f"Port {i} state {val}")
-            if not self.ports.get(i):
-                self.ports[i] = {}
-            self.ports[i]["state"] = STATE_ON if val else STATE_OFF
+        switches = int_to_bool_list(int(values['portPoE']))
+        for port, val in zip(self.ports, switches):
+            _LOGGER.debug(f"Port {port.index} state {val}")
+            port.update('poe_enabled', val)
 
         return True
 
     async def _fetch_poe_port_power(self):
-        if not await self._login():
+        values = await self._fetch_values(ENDPOINT_POE, POE_PAGE)
+        if values is None:
             return False
 
-        ok, text = await self.execute(METHOD_GET, f"http://{self.host}/poe_data.js")
-        if not ok:
-            return False
+        watching = ENDPOINT_POE in self._last_fetched
+        now = time.time()
+        for port, val in zip(self.ports, values['port_power']):
+            _LOGGER.debug(f"Port {port.index} power {val}W")
+            if watching and abs(float(val) - port.power) >= ADAPTIVE_POWER_THRESHOLD:
+                self._activity = True
+            self.totals.power_changed(port.power, float(val))
+            port.update_power(float(val), self._power_deadband)
+            port.history.add(now, float(val))
+            port.is_poe_port = True
+        self.totals.sum_power(self.ports)
+        self._check_headroom()
+
+        if time.monotonic() - self._energy_saved_at >= ENERGY_SAVE_INTERVAL:
+            self._energy_saved_at = time.monotonic()
+            self._async_schedule_save()
+        return True
 
-        m = re.findall(r"port_power\s?=\s?\[([\s\d+\.,]+)\]", text)
-        if not m or len(m) < 1:
-            _LOGGER.info(f"Unexpected response received during update state: {text}")
-            return False
+    async def _fetch_stage(self, endpoint, limit=None):
+        async with limit or self._poll_semaphore:
+            start = time.monotonic()
+            try:
+                return await self._fetchers[endpoint]()
+            finally:
+                self.stage_durations[endpoint] = time.monotonic() - start
+                _LOGGER.debug(f"Fetching {endpoint} took {self.stage_durations[endpoint]:.3f}s")
+
+    async def _fetch_stages(self, endpoints):
+        results = {}
+        if not self.ports and ENDPOINT_SYSTEM in endpoints:
+            # The number of ports follows from the model on the system page, so it is fetched first
+            results[ENDPOINT_SYSTEM] = await self._fetch_stage(ENDPOINT_SYSTEM)
+        remaining = [endpoint for endpoint in endpoints if endpoint not in results]
+        if self.ports:
+            results.update(zip(remaining, await asyncio.gather(*(self._fetch_stage(endpoint) for endpoint in remaining))))
+        return [results.get(endpoint, False) for endpoint in endpoints]
+
+    def _clear_port_changes(self):
+        for port in self.ports:
+            port.clear_changes()
+
+    def _endpoint_interval(self, endpoint):
+        if self.adaptive_interval is not None and endpoint in (ENDPOINT_POE, ENDPOINT_LINK):
+            return self.adaptive_interval
+        return self.endpoint_intervals[endpoint]
+
+    def _due_endpoints(self):
+        now = time.monotonic()
+        # Allow half a tick of slack so timer jitter does not push an endpoint a full tick back
+        slack = self.poll_interval.total_seconds() / 2
+        return [
+            endpoint for endpoint in self.endpoint_intervals
+            if endpoint not in self._last_fetched or now - self._last_fetched[endpoint] >= self._endpoint_interval(endpoint) - slack
+        ]
+
+    def _adapt_poll_interval(self):
+        if self.adaptive_interval is None:
+            return
+
+        ceiling = self.endpoint_intervals[ENDPOINT_PORT_STATE]
+        if self._activity:
+            interval = ADAPTIVE_MIN_INTERVAL
+        else:
+            interval = min(ceiling, self.adaptive_interval * ADAPTIVE_BACKOFF)
+        self._activity = False
+        if interval == self.adaptive_interval:
+            return
+
+        _LOGGER.debug(f"Adapting power and link update interval of {self.name} to {interval:.1f}s")
+        self.adaptive_interval = interval
+        self.poll_interval = timedelta(seconds=min(self._endpoint_interval(endpoint) for endpoint in self.endpoint_intervals))
+        self._diagnostics_changed = True
+        if self._scheduler is not None:
+            self._scheduler.async_interval_changed(self)
+
+    @callback
+    def async_start_link_watch(self):
+        if self._link_watch_interval:
+            self._unsub_link_watch = async_track_time_interval(
+                self.hass, self._async_watch_links, timedelta(seconds=self._link_watch_interval), name=f"{self.name} link watch"
+            )
 
-        powers = [x.strip() for x in m[0].split(',')]
-        for i, val in enumerate(powers):
-            _LOGGER.debug(f"Port {i} power {val}W")
-            if not self.ports.get(i):
-                self.ports[i] = {}
-            self.ports[i]["power"] = float(val)
-            self.ports[i]["is_poe_port"] = True
-        return True
+    @callback
+    def async_stop_link_watch(self):
+        if self._unsub_link_watch:
+            self._unsub_link_watch()
+            self._unsub_link_watch = None
+
+    async def _async_watch_links(self, now=None):
+        """Fetch only the link page, between and independent of the polls."""
+        # A running poll fetches the links itself, an unreachable switch is left to the breaker
+        if self._watching_links or self._polling or not self.ports or self.breaker.state is not BreakerState.CLOSED:
+            return
+        self._watching_links = True
+        try:
+            await self._async_read_back(ENDPOINT_LINK)
+        finally:
+            self._watching_links = False
+
+    def _mark_fetched(self, endpoint):
+        self._last_fetched[endpoint] = time.monotonic()
+        self._unloaded.discard(endpoint)
+        self.stats.last_success[endpoint] = dt_util.utcnow()
+
+    def invalidate_endpoint(self, endpoint):
+        """Fetch the endpoint on the next refresh regardless of its schedule."""
+        self._last_fetched.pop(endpoint, None)
+
+    def endpoint_updated(self, endpoint):
+        """Return whether entities showing data of the endpoint should write their state."""
+        return endpoint in self.refreshed_endpoints or not self.last_update_success or self.availability_changed
+
+    def port_changed(self, port, field):
+        """Return whether entities showing the field of the port should write their state."""
+        return bool(self.ports[port].changed & field) or not self.last_update_success or self.availability_changed
+
+    def _changed_contexts(self):
+        changed = {port.index for port in self.ports if port.changed}
+        # Entities without a port show the system info
+        if ENDPOINT_SYSTEM in self.refreshed_endpoints:
+            changed.add(None)
+        if self._diagnostics_changed:
+            changed.add(CONTEXT_DIAGNOSTICS)
+            self._diagnostics_changed = False
+        if ENDPOINT_POE in self.refreshed_endpoints:
+            changed.add(CONTEXT_ENERGY)
+        totals = (round(self.totals.power, 1), self.totals.powered_ports, self.totals.link_up_ports)
+        if totals != self._notified_totals:
+            self._notified_totals = totals
+            changed.add(CONTEXT_TOTALS)
+        changed.add(CONTEXT_STATISTICS)
+        return changed
+
+    @callback
+    def async_update_listeners(self):
+        self.availability_changed = self.last_update_success != self._notified_success
+        self._notified_success = self.last_update_success
+        if not self.last_update_success or self.availability_changed:
+            super().async_update_listeners()
+        else:
+            # Only entities of ports with changed values are notified
+            changed = self._changed_contexts()
+            for update_callback, context in list(self._listeners.values()):
+                if context in changed:
+                    update_callback()
+
+        # Changes are tracked until they were notified, whether by a poll, a read back or a write
+        self.refreshed_endpoints = set()
+        self._clear_port_changes()
 
     async def _async_update_data(self):
-        _LOGGER.debug("Polling for updates")
-        for _ in range(MAX_APP_RETRIES):
-            if await self._fetch_poe_port_state() and await self._fetch_poe_port_power() and await self._fetch_system_info() and await self._fetch_link_info():
-                return
-            _LOGGER.info("Retry fetching state")
-            await asyncio.sleep(2)
-        raise UpdateFailed("Failed to refresh state")
+        due = self._due_endpoints()
+        _LOGGER.debug(f"Polling for updates of {', '.join(due)}")
 
+        if not self.breaker.allow_request():
+            raise UpdateFailed(f"{self.name} is unreachable, next attempt in {self.breaker.retry_in:.0f}s")
+
+        breaker_state = self.breaker.state
+        start = time.monotonic()
+        _poll_deadline.set(start + POLL_TIME_BUDGET)
+        self._polling = True
+        try:
+            await self._fetch_with_retries(due)
+        except UpdateFailed:
+            self.breaker.record_failure()
+            raise
+        else:
+            self.breaker.record_success()
+        finally:
+            _poll_deadline.set(None)
+            self._polling = False
+            self.stats.last_poll_duration = time.monotonic() - start
+            if self.breaker.state is not breaker_state:
+                _LOGGER.info(f"Circuit breaker of {self.name} is now {self.breaker.state.value}")
+                self._diagnostics_changed = True
+            self._adapt_poll_interval()
+
+    async def _fetch_with_retries(self, due):
+        pending = due
+        for i in range(MAX_APP_RETRIES):
+            if i != 0:
+                _LOGGER.info(f"Retry fetching {', '.join(pending)}")
+                self.stats.poll_retries += 1
+                if not await self._async_backoff(i):
+                    break
+
+            results = await self._fetch_stages(pending)
+            # Only the endpoints that failed are fetched again, successful ones are kept
+            for endpoint, ok in zip(pending, results):
+                if ok:
+                    self._mark_fetched(endpoint)
+                    self.refreshed_endpoints.add(endpoint)
+            pending = [endpoint for endpoint, ok in zip(pending, results) if not ok]
+            if not pending:
+                return
 
-    async def _async_setup(self):
-        await self._fetch_system_info()
+        if len(pending) == len(due):
+            raise UpdateFailed("Failed to refresh state")
+        if self._unloaded:
+            # A partial first load would set up the switch without its POE ports
+            raise UpdateFailed(f"Failed to load {', '.join(sorted(self._unloaded))}")
+        _LOGGER.warning(f"Failed to refresh {', '.join(pending)}, keeping previous values")
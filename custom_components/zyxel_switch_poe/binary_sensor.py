@@ -1,17 +1,21 @@
+from homeassistant.core import callback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.components.binary_sensor import BinarySensorEntity
+from homeassistant.components.binary_sensor import BinarySensorEntity, BinarySensorDeviceClass
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.const import STATE_ON
 
-from .const import KEY_POESWITCH, DOMAIN
+from .const import KEY_POESWITCH, DOMAIN, CONTEXT_DIAGNOSTICS
+from .models import PortField
+from .breaker import BreakerState
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     coordinator = hass.data[KEY_POESWITCH][config_entry.entry_id]
 
     entities = []
-    for port_idx, _ in coordinator.ports.items():
-        entities.append(PortLinkStateEntity(coordinator, port_idx))
+    for port in coordinator.ports:
+        entities.append(PortLinkStateEntity(coordinator, port.index))
+    entities.append(CircuitBreakerEntity(coordinator))
 
     async_add_entities(entities, update_before_add=False)
 
@@ -38,3 +42,49 @@ class PortLinkStateEntity(CoordinatorEntity, BinarySensorEntity):
     @property
     def is_on(self) -> bool:
         return self.coordinator.get_port_link_state(self.coordinator_context) == STATE_ON
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        if not self.coordinator.port_changed(self.coordinator_context, PortField.LINK_UP):
+            return
+        self.async_write_ha_state()
+
+class CircuitBreakerEntity(CoordinatorEntity, BinarySensorEntity):
+    """On while polling of an unreachable switch is suspended."""
+    def __init__(self, coordinator):
+        super().__init__(coordinator, context=CONTEXT_DIAGNOSTICS)
+        self._attr_unique_id = f"{self.coordinator.host}_unreachable"
+        self._attr_device_class = BinarySensorDeviceClass.PROBLEM
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        """Return the device info."""
+        return DeviceInfo(
+            identifiers={
+                (DOMAIN, self.coordinator.host)
+            }
+        )
+
+    @property
+    def name(self) -> str:
+        return f"{self.coordinator.name} unreachable"
+
+    @property
+    def available(self) -> bool:
+        # Reports on the failing polls, so it stays available when they fail
+        return True
+
+    @property
+    def is_on(self) -> bool:
+        return self.coordinator.breaker.state is not BreakerState.CLOSED
+
+    @property
+    def extra_state_attributes(self):
+        breaker = self.coordinator.breaker
+        return {
+            "state": breaker.state.value,
+            "failures": breaker.failures,
+            "retry_in": round(breaker.retry_in),
+        }
@@ -0,0 +1,58 @@
+"""Circuit breaker that stops polling a switch that does not respond."""
+import time
+
+from enum import Enum
+
+from .const import BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT, BREAKER_MAX_RESET_TIMEOUT
+
+
+class BreakerState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Opens after consecutive failed polls and lets a single probe through after a cool down.
+
+    Every failed probe doubles the cool down up to a maximum, a successful
+    probe closes the breaker again.
+    """
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_TIMEOUT, max_reset_timeout=BREAKER_MAX_RESET_TIMEOUT):
+        self.state = BreakerState.CLOSED
+        self.failures = 0
+        self._failure_threshold = failure_threshold
+        self._base_reset_timeout = reset_timeout
+        self._max_reset_timeout = max_reset_timeout
+        self.reset_timeout = reset_timeout
+        self._opened_at = None
+
+    @property
+    def retry_in(self):
+        """Seconds until the next probe is allowed while open."""
+        if self.state is not BreakerState.OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def allow_request(self):
+        if self.state is BreakerState.OPEN and self.retry_in == 0:
+            self.state = BreakerState.HALF_OPEN
+        return self.state is not BreakerState.OPEN
+
+    def record_success(self):
+        self.state = BreakerState.CLOSED
+        self.failures = 0
+        self.reset_timeout = self._base_reset_timeout
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state is BreakerState.HALF_OPEN:
+            self.reset_timeout = min(self._max_reset_timeout, self.reset_timeout * 2)
+            self._open()
+        elif self.failures >= self._failure_threshold:
+            self._open()
+
+    def _open(self):
+        self.state = BreakerState.OPEN
+        self._opened_at = time.monotonic()
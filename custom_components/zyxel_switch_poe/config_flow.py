@@ -3,9 +3,20 @@ import logging
 import voluptuous as vol
 
 from homeassistant import config_entries
+from homeassistant.core import callback
 from homeassistant.const import CONF_HOST, CONF_NAME, CONF_PASSWORD, CONF_SCAN_INTERVAL
 
-from .const import DOMAIN
+from .const import (
+    DOMAIN,
+    CONF_PARALLEL_REQUESTS, DEFAULT_PARALLEL_REQUESTS, MAX_PARALLEL_REQUESTS,
+    CONF_POWER_SCAN_INTERVAL, DEFAULT_POWER_SCAN_INTERVAL,
+    CONF_OPTIMISTIC, DEFAULT_OPTIMISTIC,
+    CONF_POWER_DEADBAND, DEFAULT_POWER_DEADBAND,
+    CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING,
+    CONF_LINK_WATCH_INTERVAL, DEFAULT_LINK_WATCH_INTERVAL, MAX_LINK_WATCH_INTERVAL,
+    CONF_RECORD_TRANSCRIPT, DEFAULT_RECORD_TRANSCRIPT,
+    CONF_POE_BUDGET, DEFAULT_CONF_POE_BUDGET, MAX_POE_BUDGET,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -19,6 +30,11 @@ class ZyxelPOEFlowHandler(config_entries.ConfigFlow):
     def __init__(self):
         self._errors = {}
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        return ZyxelPOEOptionsFlowHandler(config_entry)
+
     async def async_step_import(self, user_input):
         """Import a config entry."""
         if self._async_current_entries():
@@ -36,6 +52,14 @@ class ZyxelPOEFlowHandler(config_entries.ConfigFlow):
             name = user_input[CONF_NAME]
             password = user_input[CONF_PASSWORD]
             interval = user_input[CONF_SCAN_INTERVAL]
+            power_interval = user_input[CONF_POWER_SCAN_INTERVAL]
+            parallel_requests = user_input[CONF_PARALLEL_REQUESTS]
+            optimistic = user_input[CONF_OPTIMISTIC]
+            power_deadband = user_input[CONF_POWER_DEADBAND]
+            adaptive_polling = user_input[CONF_ADAPTIVE_POLLING]
+            link_watch_interval = user_input[CONF_LINK_WATCH_INTERVAL]
+            poe_budget = user_input[CONF_POE_BUDGET]
+            record_transcript = user_input[CONF_RECORD_TRANSCRIPT]
 
             return self.async_create_entry(
                 title=host,
@@ -43,7 +67,15 @@ class ZyxelPOEFlowHandler(config_entries.ConfigFlow):
                     CONF_HOST: host,
                     CONF_NAME: name,
                     CONF_PASSWORD: password,
-                    CONF_SCAN_INTERVAL: interval
+                    CONF_SCAN_INTERVAL: interval,
+                    CONF_POWER_SCAN_INTERVAL: power_interval,
+                    CONF_PARALLEL_REQUESTS: parallel_requests,
+                    CONF_OPTIMISTIC: optimistic,
+                    CONF_POWER_DEADBAND: power_deadband,
+                    CONF_ADAPTIVE_POLLING: adaptive_polling,
+                    CONF_LINK_WATCH_INTERVAL: link_watch_interval,
+                    CONF_POE_BUDGET: poe_budget,
+                    CONF_RECORD_TRANSCRIPT: record_transcript
                 }
             )
 
@@ -59,5 +91,34 @@ class ZyxelPOEFlowHandler(config_entries.ConfigFlow):
                 vol.Required(CONF_PASSWORD, default=None): str,
                 vol.Optional(CONF_NAME, default=""): str,
                 vol.Optional(CONF_SCAN_INTERVAL, default=60):  vol.All(vol.Coerce(int), vol.Range(min=30, max=300)),
+                vol.Optional(CONF_POWER_SCAN_INTERVAL, default=DEFAULT_POWER_SCAN_INTERVAL): vol.All(vol.Coerce(int), vol.Range(min=5, max=300)),
+                vol.Optional(CONF_PARALLEL_REQUESTS, default=DEFAULT_PARALLEL_REQUESTS): vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_PARALLEL_REQUESTS)),
+                vol.Optional(CONF_OPTIMISTIC, default=DEFAULT_OPTIMISTIC): bool,
+                vol.Optional(CONF_POWER_DEADBAND, default=DEFAULT_POWER_DEADBAND): vol.All(vol.Coerce(float), vol.Range(min=0, max=10)),
+                vol.Optional(CONF_ADAPTIVE_POLLING, default=DEFAULT_ADAPTIVE_POLLING): bool,
+                vol.Optional(CONF_LINK_WATCH_INTERVAL, default=DEFAULT_LINK_WATCH_INTERVAL): vol.All(vol.Coerce(int), vol.Range(min=0, max=MAX_LINK_WATCH_INTERVAL)),
+                vol.Optional(CONF_POE_BUDGET, default=DEFAULT_CONF_POE_BUDGET): vol.All(vol.Coerce(int), vol.Range(min=0, max=MAX_POE_BUDGET)),
+                vol.Optional(CONF_RECORD_TRANSCRIPT, default=DEFAULT_RECORD_TRANSCRIPT): bool,
+            }),
+        )
+
+
+class ZyxelPOEOptionsFlowHandler(config_entries.OptionsFlow):
+    """Options of a switch that can change after it was added."""
+
+    def __init__(self, config_entry):
+        self.config_entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        record_transcript = self.config_entry.options.get(
+            CONF_RECORD_TRANSCRIPT, self.config_entry.data.get(CONF_RECORD_TRANSCRIPT, DEFAULT_RECORD_TRANSCRIPT)
+        )
+        return self.async_show_form(
+            step_id='init',
+            data_schema=vol.Schema({
+                vol.Optional(CONF_RECORD_TRANSCRIPT, default=record_transcript): bool,
             }),
         )
@@ -3,6 +3,124 @@ DOMAIN = 'zyxel_switch_poe'
 BRAND = 'Zyxel'
 
 KEY_POESWITCH = 'poeswitch'
+DATA_SCHEDULER = 'scheduler'
+
+# Coordinator context of entities showing how the integration itself performs
+CONTEXT_DIAGNOSTICS = 'diagnostics'
+# Context of the entities showing request statistics, notified after every poll
+CONTEXT_STATISTICS = 'statistics'
+# Context of the energy entities, notified after every refresh of the power page
+CONTEXT_ENERGY = 'energy'
+# Context of the switch wide power and port count entities
+CONTEXT_TOTALS = 'totals'
+
+STORAGE_VERSION = 1
+# Seconds a changed snapshot waits before it is written, changes in between are saved together
+SNAPSHOT_SAVE_DELAY = 60
+
+# Maximum number of requests in flight over all switches together
+DEFAULT_MAX_IN_FLIGHT = 8
+
+MODEL_PORT_COUNT = {
+    "GS1200-5HP v2": 5,
+    "GS1200-8HP v2": 8,
+}
+DEFAULT_PORT_COUNT = 8
+# Watts both models can supply over all their POE ports together
+MODEL_POE_BUDGET = {
+    "GS1200-5HP v2": 60,
+    "GS1200-8HP v2": 60,
+}
+DEFAULT_POE_BUDGET = 60
 
 METHOD_POST = "POST"
 METHOD_GET = "GET"
+
+CONF_PARALLEL_REQUESTS = "parallel_requests"
+DEFAULT_PARALLEL_REQUESTS = 1
+MAX_PARALLEL_REQUESTS = 4
+
+CONF_POWER_SCAN_INTERVAL = "power_scan_interval"
+DEFAULT_POWER_SCAN_INTERVAL = 10
+# Link state and speed are refreshed at most this many seconds apart
+LINK_SCAN_INTERVAL = 30
+# Uptime and LED state, name/model/MAC/firmware are only reloaded after a reboot
+SYSTEM_SCAN_INTERVAL = 300
+
+CONF_ADAPTIVE_POLLING = "adaptive_polling"
+DEFAULT_ADAPTIVE_POLLING = False
+# Adaptive polling drops to this many seconds after activity and relaxes by ADAPTIVE_BACKOFF per quiet poll
+ADAPTIVE_MIN_INTERVAL = 5
+ADAPTIVE_BACKOFF = 1.5
+# Power changes of at least this many watts count as activity
+ADAPTIVE_POWER_THRESHOLD = 2.0
+
+# Seconds between extra fetches of the link page only, 0 disables them
+CONF_LINK_WATCH_INTERVAL = "link_watch_interval"
+DEFAULT_LINK_WATCH_INTERVAL = 0
+MAX_LINK_WATCH_INTERVAL = 30
+EVENT_LINK_CHANGED = f"{DOMAIN}_link_changed"
+
+CONF_RECORD_TRANSCRIPT = "record_transcript"
+DEFAULT_RECORD_TRANSCRIPT = False
+# Recorded requests are written to the transcript once this many are pending
+TRANSCRIPT_FLUSH_ENTRIES = 50
+
+# POE budget in watts, 0 uses the budget of the model
+CONF_POE_BUDGET = "poe_budget"
+DEFAULT_CONF_POE_BUDGET = 0
+MAX_POE_BUDGET = 500
+# Headroom is low below this many watts and recovers POE_HEADROOM_HYSTERESIS watts above it
+POE_HEADROOM_THRESHOLD = 6
+POE_HEADROOM_HYSTERESIS = 1
+EVENT_POE_HEADROOM = f"{DOMAIN}_poe_headroom"
+
+SERVICE_POWER_CYCLE = "power_cycle"
+ATTR_OFF_TIME = "off_time"
+# Seconds ports stay off during a power cycle
+DEFAULT_OFF_TIME = 5
+MAX_OFF_TIME = 120
+# Switches power cycled at the same time by one service call
+POWER_CYCLE_MAX_SWITCHES = 8
+
+# Power readings kept per port for the min, max and mean, an hour at the default power update interval
+POWER_HISTORY_SIZE = 360
+# Readings further apart than this many seconds are not integrated into the energy
+POWER_GAP_LIMIT = 300
+# Seconds between saves of the energy counters
+ENERGY_SAVE_INTERVAL = 600
+
+# Polls failing in a row before a switch is considered unreachable
+BREAKER_FAILURE_THRESHOLD = 3
+# Seconds before an unreachable switch is probed again, doubled after every failed probe
+BREAKER_RESET_TIMEOUT = 30
+BREAKER_MAX_RESET_TIMEOUT = 600
+
+# Request timeouts follow the p99 latency of the last LATENCY_WINDOW requests to the same page
+LATENCY_WINDOW = 256
+# Until this many requests were timed the default timeout is used
+LATENCY_MIN_SAMPLES = 20
+LATENCY_TIMEOUT_FACTOR = 3
+LATENCY_TIMEOUT_FLOOR = 0.3
+# Upper bounds in seconds of the histogram buckets shown in diagnostics
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+CONF_POWER_DEADBAND = "power_deadband"
+DEFAULT_POWER_DEADBAND = 0.0
+
+CONF_OPTIMISTIC = "optimistic"
+DEFAULT_OPTIMISTIC = True
+# Seconds an optimistic state waits for the switch to confirm it before rolling back
+WRITE_CONFIRM_TIMEOUT = 30
+
+EVENT_WRITE_FAILED = f"{DOMAIN}_write_failed"
+
+PATH_LOGIN = "login.cgi"
+PATH_LOGOUT = "logout.html"
+PATH_LED_CFG = "led_cfg.cgi"
+PATH_PORT_STATE_SET = "port_state_set.cgi"
+
+ENDPOINT_SYSTEM = "system_data.js"
+ENDPOINT_LINK = "link_data.js"
+ENDPOINT_PORT_STATE = "port_state_data.js"
+ENDPOINT_POE = "poe_data.js"
@@ -0,0 +1,35 @@
+"""Diagnostics support for ZyXEL POE switches."""
+import dataclasses
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_PASSWORD
+
+from .const import KEY_POESWITCH
+
+TO_REDACT = {CONF_PASSWORD, "mac", "token"}
+
+
+async def async_get_config_entry_diagnostics(hass, config_entry):
+    coordinator = hass.data[KEY_POESWITCH][config_entry.entry_id]
+    stats = dataclasses.asdict(coordinator.stats)
+    stats["last_success"] = {endpoint: when.isoformat() for endpoint, when in stats["last_success"].items()}
+    return {
+        "config_entry": async_redact_data(dict(config_entry.data), TO_REDACT),
+        "device_info": async_redact_data(coordinator.device_info, TO_REDACT),
+        "last_update_success": coordinator.last_update_success,
+        "poll_interval": coordinator.poll_interval.total_seconds(),
+        "schedule_lag": coordinator.schedule_lag,
+        "breaker": {
+            "state": coordinator.breaker.state.value,
+            "failures": coordinator.breaker.failures,
+            "retry_in": coordinator.breaker.retry_in,
+        },
+        "logins": coordinator.login_count,
+        "last_login_duration": coordinator.last_login_duration,
+        "session_lifetime": coordinator.session_lifetime,
+        "stats": stats,
+        "stage_durations": coordinator.stage_durations,
+        "latency": coordinator.latency_stats(),
+        "transport": coordinator.transport_stats(),
+        "ports": [port.snapshot() for port in coordinator.ports],
+    }
@@ -0,0 +1,59 @@
+"""Power history and energy of a port, kept without the recorder."""
+from array import array
+
+from .const import POWER_HISTORY_SIZE, POWER_GAP_LIMIT
+
+
+class PowerHistory:
+    """Ring buffer of the last POWER_HISTORY_SIZE power readings of a port.
+
+    Readings are stored in preallocated arrays so a port costs the same
+    memory however long it runs. The energy is integrated with the
+    trapezoidal rule as readings come in, gaps longer than POWER_GAP_LIMIT
+    seconds are not integrated.
+    """
+
+    __slots__ = ('_values', '_times', '_next', '_count', '_last_watts', 'energy')
+
+    def __init__(self, size=POWER_HISTORY_SIZE, energy=0.0):
+        self._values = array('f', bytes(4 * size))
+        self._times = array('d', bytes(8 * size))
+        self._next = 0
+        self._count = 0
+        # The values are stored as float32, the energy is integrated from the exact reading
+        self._last_watts = 0.0
+        # kWh since the port was first seen
+        self.energy = energy
+
+    def __len__(self):
+        return self._count
+
+    def add(self, timestamp, watts):
+        if self._count:
+            elapsed = timestamp - self._times[self._next - 1]
+            if 0 < elapsed <= POWER_GAP_LIMIT:
+                self.energy += (self._last_watts + watts) / 2 * elapsed / 3600000
+        self._last_watts = watts
+        self._values[self._next] = watts
+        self._times[self._next] = timestamp
+        self._next = (self._next + 1) % len(self._values)
+        self._count = min(self._count + 1, len(self._values))
+
+    def _samples(self):
+        return self._values if self._count == len(self._values) else self._values[:self._count]
+
+    def minimum(self):
+        return min(self._samples()) if self._count else None
+
+    def maximum(self):
+        return max(self._samples()) if self._count else None
+
+    def mean(self):
+        return sum(self._samples()) / self._count if self._count else None
+
+    def span(self):
+        """Seconds between the oldest and newest reading."""
+        if not self._count:
+            return 0.0
+        oldest = self._next if self._count == len(self._values) else 0
+        return self._times[self._next - 1] - self._times[oldest]
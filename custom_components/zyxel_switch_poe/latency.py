@@ -0,0 +1,75 @@
+"""Rolling request latency statistics used to size request timeouts."""
+import bisect
+
+from collections import deque
+
+from .const import (
+    LATENCY_WINDOW,
+    LATENCY_MIN_SAMPLES,
+    LATENCY_TIMEOUT_FACTOR,
+    LATENCY_TIMEOUT_FLOOR,
+    LATENCY_BUCKETS,
+)
+
+
+class LatencyHistogram:
+    """Latencies of the last LATENCY_WINDOW requests to one endpoint."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self._samples = deque(maxlen=window)
+        self.count = 0
+        self.timeouts = 0
+        self._timeouts_in_row = 0
+
+    def __len__(self):
+        return len(self._samples)
+
+    def record(self, seconds, timed_out=False):
+        """Record the duration of a request, a timed out request counts with the timeout it hit."""
+        self._samples.append(seconds)
+        self.count += 1
+        if timed_out:
+            self.timeouts += 1
+            self._timeouts_in_row += 1
+        else:
+            self._timeouts_in_row = 0
+
+    def samples(self):
+        return list(self._samples)
+
+    def percentile(self, pct):
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def timeout(self, ceiling):
+        """Timeout for the next request: p99 times a factor, between the floor and ceiling.
+
+        Every timeout in a row doubles it, a switch that got slow gets more
+        time before enough slow samples moved the p99.
+        """
+        if len(self._samples) < LATENCY_MIN_SAMPLES:
+            return ceiling
+        timeout = max(LATENCY_TIMEOUT_FLOOR, self.percentile(99) * LATENCY_TIMEOUT_FACTOR)
+        return min(ceiling, timeout * 2 ** self._timeouts_in_row)
+
+    def buckets(self):
+        """Sample counts per upper bound in seconds, the last bucket has no bound."""
+        counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        for sample in self._samples:
+            counts[bisect.bisect_left(LATENCY_BUCKETS, sample)] += 1
+        bounds = [str(bound) for bound in LATENCY_BUCKETS] + ["inf"]
+        return dict(zip(bounds, counts))
+
+    def as_dict(self, ceiling):
+        return {
+            "requests": self.count,
+            "timeouts": self.timeouts,
+            "samples": len(self._samples),
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "timeout": self.timeout(ceiling),
+            "buckets": self.buckets(),
+        }
@@ -0,0 +1,112 @@
+"""Data model of the ports of a switch."""
+from enum import IntFlag
+from dataclasses import dataclass, field
+
+from .history import PowerHistory
+
+
+class PortField(IntFlag):
+    NONE = 0
+    POE_ENABLED = 1
+    POWER = 2
+    LINK_UP = 4
+    SPEED = 8
+
+
+_FIELD_FLAGS = {
+    'poe_enabled': PortField.POE_ENABLED,
+    'power': PortField.POWER,
+    'link_up': PortField.LINK_UP,
+    'speed': PortField.SPEED,
+}
+
+# Fields of a port kept in the snapshot restored at startup
+_SNAPSHOT_FIELDS = ('index', 'is_poe_port', 'poe_enabled', 'power', 'link_up', 'speed')
+
+
+@dataclass(slots=True)
+class PortState:
+    index: int
+    is_poe_port: bool = False
+    poe_enabled: bool = True
+    power: float = 0.0
+    link_up: bool = False
+    speed: str = ''
+    # Power of the last reading that was flagged as a change
+    reported_power: float = 0.0
+    # Fields that changed since the last call to clear_changes()
+    changed: PortField = PortField.NONE
+    history: PowerHistory = field(default_factory=PowerHistory, repr=False, compare=False)
+
+    def update(self, name, value):
+        if getattr(self, name) != value:
+            setattr(self, name, value)
+            self.changed |= _FIELD_FLAGS[name]
+
+    def update_power(self, value, deadband=0.0):
+        """Store a power reading, only flag it as changed when it moved at least deadband watts."""
+        self.power = value
+        if value == self.reported_power:
+            return
+        # Starting or stopping to draw power is always a change
+        if abs(value - self.reported_power) >= deadband or (value == 0) != (self.reported_power == 0):
+            self.reported_power = value
+            self.changed |= PortField.POWER
+
+    def clear_changes(self):
+        self.changed = PortField.NONE
+
+    def snapshot(self):
+        data = {name: getattr(self, name) for name in _SNAPSHOT_FIELDS}
+        data['energy'] = self.history.energy
+        return data
+
+    @classmethod
+    def from_snapshot(cls, data):
+        port = cls(**{name: data[name] for name in _SNAPSHOT_FIELDS if name in data})
+        port.reported_power = port.power
+        port.history.energy = data.get('energy', 0.0)
+        return port
+
+
+@dataclass(slots=True)
+class SwitchStats:
+    """Counters of the requests made to a switch since the integration was loaded."""
+    last_poll_duration: float | None = None
+    request_retries: int = 0
+    poll_retries: int = 0
+    write_retries: int = 0
+    # Rejected logins and requests answered with the login page
+    auth_failures: int = 0
+    # Per endpoint, the time it was last refreshed successfully
+    last_success: dict = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class PortTotals:
+    """Switch wide sums over the ports, updated from the changes of single ports.
+
+    The power is summed again over the ports after each reading, a running
+    sum of differences would drift away from it by the rounding errors.
+    """
+    power: float = 0.0
+    powered_ports: int = 0
+    link_up_ports: int = 0
+
+    @classmethod
+    def of(cls, ports):
+        totals = cls()
+        for port in ports:
+            totals.power_changed(0.0, port.power)
+            totals.link_changed(False, port.link_up)
+        totals.sum_power(ports)
+        return totals
+
+    def power_changed(self, old, new):
+        self.powered_ports += (new > 0) - (old > 0)
+
+    def sum_power(self, ports):
+        self.power = sum(port.power for port in ports)
+
+    def link_changed(self, old, new):
+        self.link_up_ports += new - old
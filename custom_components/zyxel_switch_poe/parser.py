@@ -0,0 +1,70 @@
+"""Parser for the javascript data pages served by the switch."""
+import re
+
+# = 'text'; | = "text"; | = [items] | = 12;
+# Quoted values run to the last quote before a semicolon on the line, like the
+# per-field patterns this replaced, so a name like Bob's switch is kept whole.
+# Arrays run to the first closing bracket and may span lines.
+_VALUE = re.compile(r"""\s*=\s*(?:'(.*)'\s*;|"(.*)"\s*;|\[([^\]]*)\]|([^;\s'"\[]+)\s*;)""")
+# Groups of the value alternatives
+_ITEMS = 3
+_BARE = 4
+_QUOTES = ("'", '"')
+
+
+def _number(value):
+    try:
+        return float(value) if "." in value else int(value)
+    except ValueError:
+        return value
+
+
+def _parse_array(items):
+    # Items are split on commas like the fetchers did before, the pages have
+    # arrays of quoted strings without commas in them or of numbers
+    if items.lstrip()[:1] in _QUOTES:
+        return [item.strip()[1:-1] for item in items.split(",")]
+    items = items.split(",")
+    try:
+        return [float(item) if "." in item else int(item) for item in items]
+    except ValueError:
+        # Empty items or items that are no numbers
+        return [_number(item.strip()) for item in items if item.strip()]
+
+
+class DataPage:
+    """The variables a fetcher needs from a data page.
+
+    Each name is looked up with str.find and its value matched with one
+    precompiled pattern at that position, other variables on the page are
+    skipped at the speed of the substring search. The first assignment of
+    a name wins, with or without var. Quoted values are returned as
+    strings, unquoted values as int or float when they are numbers and
+    arrays as lists of those.
+    """
+
+    def __init__(self, *names):
+        self.names = names
+
+    def parse(self, text):
+        values = {}
+        find = text.find
+        match_value = _VALUE.match
+        for name in self.names:
+            index = find(name)
+            while index != -1:
+                end = index + len(name)
+                # Skip where the name is part of a longer name or not assigned
+                if index and (text[index - 1].isalnum() or text[index - 1] == "_") or (match := match_value(text, end)) is None:
+                    index = find(name, end)
+                    continue
+                kind = match.lastindex
+                if kind == _ITEMS:
+                    values[name] = _parse_array(match[kind])
+                elif kind == _BARE:
+                    values[name] = _number(match[kind])
+                else:
+                    values[name] = match[kind]
+                break
+        return values
+
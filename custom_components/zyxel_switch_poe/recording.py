@@ -0,0 +1,163 @@
+"""Transcripts of the HTTP traffic of a switch, recorded and replayed."""
+import os
+import json
+import time
+import asyncio
+import logging
+
+import aiohttp
+
+from yarl import URL
+
+from .transport import Response, ResponseKind
+
+_LOGGER = logging.getLogger(__name__)
+
+REDACTED = "**REDACTED**"
+# Form fields that are never written to a transcript
+REDACT_FIELDS = {"password"}
+# Cookie set by a replayed login, the recorded token is not kept
+REPLAY_TOKEN = "replay"
+
+
+def _redact_body(body, tokens):
+    for token in tokens:
+        if token:
+            body = body.replace(token.encode(), REDACTED.encode())
+    return body
+
+
+class TranscriptRecorder:
+    """Collects requests and their responses to append them to a JSON lines file.
+
+    Entries are kept in memory until they are taken to be written from the
+    executor. Passwords in forms and login tokens in bodies are redacted,
+    a response that set a new login token is marked as a login instead.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._started = time.monotonic()
+        self._pending = []
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def record(self, method, path, data, elapsed, response=None, error=None, tokens=(), login=False):
+        entry = {
+            'at': round(time.monotonic() - self._started, 4),
+            'method': method,
+            'path': path,
+            'data': {key: REDACTED if key in REDACT_FIELDS else value for key, value in (data or {}).items()},
+            'elapsed': round(elapsed, 4),
+        }
+        if error is not None:
+            entry['error'] = error
+        else:
+            entry['kind'] = response.kind.value
+            entry['status'] = response.status
+            entry['charset'] = response.charset
+            # latin-1 maps every byte to a character, the body is replayed byte for byte
+            entry['body'] = _redact_body(response.body, tokens).decode('latin-1')
+        if login:
+            entry['login'] = True
+        self._pending.append(entry)
+
+    def take(self):
+        entries, self._pending = self._pending, []
+        return entries
+
+    def write(self, entries):
+        """Append entries to the transcript, runs in the executor."""
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as transcript:
+                for entry in entries:
+                    transcript.write(json.dumps(entry) + "\n")
+        except OSError as ex:
+            _LOGGER.warning(f"Could not write transcript {self.path}: {ex}")
+
+
+def load_transcript(path):
+    with open(path, encoding='utf-8') as transcript:
+        entries = [json.loads(line) for line in transcript if line.strip()]
+    # Entries are written in batches that may finish out of order
+    entries.sort(key=lambda entry: entry['at'])
+    return entries
+
+
+class ReplayTransport:
+    """Answers requests with the responses of a transcript instead of asking a switch.
+
+    The recorded responses of each method and path are returned in the order
+    they were recorded and start over when they run out. With a speed they
+    take their recorded time divided by it, without one they are answered
+    right away. Recorded timeouts and connection errors are raised again.
+    """
+
+    def __init__(self, host, entries, speed=None):
+        self.host = host
+        self.speed = speed
+        self.requests = 0
+        self.bytes_received = 0
+        # Requests of a method and path the transcript has no response for
+        self.missing = 0
+        self._responses = {}
+        self._next = {}
+        for entry in entries:
+            self._responses.setdefault((entry['method'], entry['path']), []).append(entry)
+        self._cookie_jar = aiohttp.CookieJar(unsafe=True)
+        # A transcript of a restored session starts logged in
+        if not any(entry.get('login') for entry in entries):
+            self._set_token()
+
+    @property
+    def cookie_jar(self):
+        return self._cookie_jar
+
+    def _set_token(self):
+        self._cookie_jar.update_cookies({'token': REPLAY_TOKEN}, URL(f"http://{self.host}/"))
+
+    async def request(self, method, path, data=None, timeout=None, expects_login_page=False):
+        key = (method, path)
+        recorded = self._responses.get(key)
+        if not recorded:
+            _LOGGER.debug(f"No recorded response for {method} {path}")
+            self.missing += 1
+            return Response(ResponseKind.FATAL, 404)
+        index = self._next.get(key, 0)
+        self._next[key] = (index + 1) % len(recorded)
+        entry = recorded[index]
+
+        delay = entry['elapsed'] / self.speed if self.speed else 0
+        if timeout is not None and delay > timeout:
+            await asyncio.sleep(timeout)
+            raise asyncio.TimeoutError
+        # Even an immediate answer lets other tasks run, as a real request would
+        await asyncio.sleep(delay)
+
+        self.requests += 1
+        error = entry.get('error')
+        if error == 'timeout':
+            raise asyncio.TimeoutError
+        if error is not None:
+            raise aiohttp.ClientConnectionError(error)
+        if entry.get('login'):
+            self._set_token()
+        body = entry['body'].encode('latin-1')
+        self.bytes_received += len(body)
+        return Response(ResponseKind(entry['kind']), entry['status'], body, entry['charset'])
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'bytes_received': self.bytes_received,
+            'connections_opened': 0,
+            'connections_reused': 0,
+            'missing_responses': self.missing,
+            'timings': {},
+        }
+
+    async def close(self):
+        pass
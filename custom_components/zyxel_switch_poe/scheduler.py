@@ -0,0 +1,186 @@
+"""Fleet wide scheduling of switch polls."""
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+
+from contextlib import asynccontextmanager
+
+from homeassistant.core import callback
+
+from .const import DEFAULT_MAX_IN_FLIGHT
+
+_LOGGER = logging.getLogger(__name__)
+
+# Lower goes first through a RequestGate
+PRIORITY_WRITE = 0
+PRIORITY_POLL = 1
+
+
+class _ScheduledPoll:
+    def __init__(self, coordinator):
+        self.coordinator = coordinator
+        self.interval = coordinator.poll_interval.total_seconds()
+        self.scheduled = None
+        self.last_fired = None
+        self.start_delay = 0.0
+        self.slot_wait = 0.0
+        self.lag = 0.0
+        self.handle = None
+        self.task = None
+
+
+class RequestGate:
+    """Admits a limited number of concurrent requests to one switch, lowest priority value first."""
+
+    def __init__(self, limit=1):
+        self._limit = limit
+        self._active = 0
+        self._waiters = []
+        self._sequence = itertools.count()
+
+    @property
+    def waiting(self):
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    @asynccontextmanager
+    async def slot(self, priority=PRIORITY_POLL):
+        if self._active < self._limit and not self._waiters:
+            self._active += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+            try:
+                await future
+            except asyncio.CancelledError:
+                # Cancelled after the slot was handed over, pass it on
+                if not future.cancelled():
+                    self._release()
+                raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # The slot goes straight to the waiter, the active count stays
+                future.set_result(None)
+                return
+        self._active -= 1
+
+
+class PollScheduler:
+    """Spreads the polls of all switches evenly over their interval.
+
+    Polls of switches with the same interval get evenly spaced phases so a
+    large fleet produces a flat load instead of a spike every interval, and
+    the number of requests in flight over all switches is limited.
+    """
+
+    def __init__(self, hass, max_in_flight=DEFAULT_MAX_IN_FLIGHT):
+        self._hass = hass
+        self._members = {}
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+
+    @callback
+    def async_register(self, coordinator, refresh_now=False):
+        member = self._members[coordinator] = _ScheduledPoll(coordinator)
+        if refresh_now:
+            # Polls scheduled while this one runs are skipped, a slow switch is never polled twice at once
+            member.task = self._hass.async_create_background_task(
+                coordinator.async_refresh(), f"{coordinator.name} first refresh"
+            )
+        self._async_rebalance()
+
+    async def async_unregister(self, coordinator):
+        """Stop polling a switch, a poll still running is cancelled before this returns."""
+        member = self._members.pop(coordinator, None)
+        if member is None:
+            return
+        if member.handle:
+            member.handle.cancel()
+        self._async_rebalance()
+        if member.task is not None and not member.task.done():
+            # The caller closes the transport of the switch next
+            member.task.cancel()
+            await asyncio.wait([member.task])
+
+    @callback
+    def async_shutdown(self):
+        for member in self._members.values():
+            if member.handle:
+                member.handle.cancel()
+                member.handle = None
+
+    @callback
+    def async_interval_changed(self, coordinator):
+        """Move the next poll of a switch that adapted its interval."""
+        member = self._members.get(coordinator)
+        if member is None:
+            return
+        member.interval = coordinator.poll_interval.total_seconds()
+        if member.handle is None or member.last_fired is None:
+            return
+        member.handle.cancel()
+        member.scheduled = max(self._hass.loop.time(), member.last_fired + member.interval)
+        member.handle = self._hass.loop.call_at(member.scheduled, self._async_fire, member)
+
+    def lag(self, coordinator):
+        """Seconds the last poll of the switch ran behind its schedule."""
+        member = self._members.get(coordinator)
+        return member.lag if member else 0.0
+
+    @asynccontextmanager
+    async def request_slot(self, coordinator):
+        """Wait until a request may be sent without exceeding the global limit."""
+        start = time.monotonic()
+        async with self._semaphore:
+            waited = time.monotonic() - start
+            member = self._members.get(coordinator)
+            if member is not None and waited > 0:
+                member.slot_wait += waited
+                member.lag = member.start_delay + member.slot_wait
+            self.in_flight += 1
+            try:
+                yield
+            finally:
+                self.in_flight -= 1
+
+    @callback
+    def _async_rebalance(self):
+        now = self._hass.loop.time()
+        groups = {}
+        for member in self._members.values():
+            groups.setdefault(member.interval, []).append(member)
+
+        for interval, members in groups.items():
+            step = interval / len(members)
+            for i, member in enumerate(members):
+                if member.handle:
+                    member.handle.cancel()
+                member.scheduled = now + (i + 1) * step
+                member.handle = self._hass.loop.call_at(member.scheduled, self._async_fire, member)
+            _LOGGER.debug(f"Spreading {len(members)} switches polled every {interval}s {step:.2f}s apart")
+
+    @callback
+    def _async_fire(self, member):
+        now = self._hass.loop.time()
+        member.last_fired = member.scheduled
+        if member.task is None or member.task.done():
+            member.start_delay = now - member.scheduled
+            member.slot_wait = 0.0
+            member.lag = member.start_delay
+            member.task = self._hass.async_create_task(member.coordinator.async_refresh())
+        else:
+            member.lag = now - member.scheduled
+            _LOGGER.info(f"Previous poll of {member.coordinator.name} still running, {member.lag:.1f}s behind schedule")
+
+        member.scheduled += member.interval
+        while member.scheduled <= now:
+            member.scheduled += member.interval
+        member.handle = self._hass.loop.call_at(member.scheduled, self._async_fire, member)
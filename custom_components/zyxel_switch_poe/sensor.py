@@ -1,33 +1,179 @@
 import logging
 
+from collections.abc import Callable
+from dataclasses import dataclass
+
 from homeassistant.core import callback
 from homeassistant.helpers.entity import EntityCategory
-from homeassistant.const import UnitOfPower, UnitOfTime
+from homeassistant.const import UnitOfPower, UnitOfTime, UnitOfInformation, UnitOfEnergy
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.components.sensor import SensorEntity, SensorEntityDescription, SensorDeviceClass
+from homeassistant.components.sensor import SensorEntity, SensorEntityDescription, SensorDeviceClass, SensorStateClass
 
-from .const import KEY_POESWITCH, DOMAIN
+from .const import (
+    KEY_POESWITCH, DOMAIN, CONTEXT_DIAGNOSTICS, CONTEXT_STATISTICS, CONTEXT_ENERGY, CONTEXT_TOTALS,
+    ENDPOINT_SYSTEM, ENDPOINT_LINK, ENDPOINT_PORT_STATE, ENDPOINT_POE,
+)
+from .models import PortField
 
 _LOGGER = logging.getLogger(__name__)
 
+TIER_NAMES = {
+    ENDPOINT_SYSTEM: "system",
+    ENDPOINT_LINK: "link",
+    ENDPOINT_PORT_STATE: "port state",
+    ENDPOINT_POE: "power",
+}
+
+
+@dataclass(frozen=True, kw_only=True)
+class StatisticEntityDescription(SensorEntityDescription):
+    value_fn: Callable
+    entity_category: EntityCategory = EntityCategory.DIAGNOSTIC
+    entity_registry_enabled_default: bool = False
+
+
+@dataclass(frozen=True, kw_only=True)
+class TotalEntityDescription(SensorEntityDescription):
+    value_fn: Callable
+
+
+def _total_descriptions(coordinator):
+    return [
+        TotalEntityDescription(
+            key="total_power",
+            name=f"{coordinator.name} total power",
+            native_unit_of_measurement=UnitOfPower.WATT,
+            device_class=SensorDeviceClass.POWER,
+            state_class=SensorStateClass.MEASUREMENT,
+            value_fn=lambda c: round(c.totals.power, 1),
+        ),
+        TotalEntityDescription(
+            key="poe_headroom",
+            name=f"{coordinator.name} POE headroom",
+            native_unit_of_measurement=UnitOfPower.WATT,
+            device_class=SensorDeviceClass.POWER,
+            state_class=SensorStateClass.MEASUREMENT,
+            value_fn=lambda c: c.poe_headroom,
+        ),
+        TotalEntityDescription(
+            key="powered_ports",
+            name=f"{coordinator.name} powered ports",
+            state_class=SensorStateClass.MEASUREMENT,
+            value_fn=lambda c: c.totals.powered_ports,
+        ),
+        TotalEntityDescription(
+            key="link_up_ports",
+            name=f"{coordinator.name} ports with link",
+            state_class=SensorStateClass.MEASUREMENT,
+            value_fn=lambda c: c.totals.link_up_ports,
+        ),
+    ]
+
+
+def _latency_ms(coordinator, endpoint):
+    latency = coordinator.latencies.get(endpoint)
+    p50 = latency.percentile(50) if latency else None
+    return None if p50 is None else round(p50 * 1000, 1)
+
+
+def _statistic_descriptions(coordinator):
+    descriptions = [
+        StatisticEntityDescription(
+            key="last_poll_duration",
+            name=f"{coordinator.name} last poll duration",
+            native_unit_of_measurement=UnitOfTime.SECONDS,
+            device_class=SensorDeviceClass.DURATION,
+            suggested_display_precision=3,
+            value_fn=lambda c: c.stats.last_poll_duration,
+        ),
+        StatisticEntityDescription(
+            key="request_retries",
+            name=f"{coordinator.name} request retries",
+            state_class=SensorStateClass.TOTAL_INCREASING,
+            value_fn=lambda c: c.stats.request_retries,
+        ),
+        StatisticEntityDescription(
+            key="poll_retries",
+            name=f"{coordinator.name} poll retries",
+            state_class=SensorStateClass.TOTAL_INCREASING,
+            value_fn=lambda c: c.stats.poll_retries,
+        ),
+        StatisticEntityDescription(
+            key="write_retries",
+            name=f"{coordinator.name} write retries",
+            state_class=SensorStateClass.TOTAL_INCREASING,
+            value_fn=lambda c: c.stats.write_retries,
+        ),
+        StatisticEntityDescription(
+            key="logins",
+            name=f"{coordinator.name} logins",
+            state_class=SensorStateClass.TOTAL_INCREASING,
+            value_fn=lambda c: c.login_count,
+        ),
+        StatisticEntityDescription(
+            key="auth_failures",
+            name=f"{coordinator.name} authentication failures",
+            state_class=SensorStateClass.TOTAL_INCREASING,
+            value_fn=lambda c: c.stats.auth_failures,
+        ),
+        StatisticEntityDescription(
+            key="bytes_received",
+            name=f"{coordinator.name} bytes received",
+            native_unit_of_measurement=UnitOfInformation.BYTES,
+            device_class=SensorDeviceClass.DATA_SIZE,
+            state_class=SensorStateClass.TOTAL_INCREASING,
+            value_fn=lambda c: c.transport_stats()['bytes_received'],
+        ),
+    ]
+    for endpoint, tier in TIER_NAMES.items():
+        descriptions.append(StatisticEntityDescription(
+            key=f"{tier.replace(' ', '_')}_latency",
+            name=f"{coordinator.name} {tier} latency",
+            native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+            device_class=SensorDeviceClass.DURATION,
+            value_fn=lambda c, endpoint=endpoint: _latency_ms(c, endpoint),
+        ))
+        descriptions.append(StatisticEntityDescription(
+            key=f"{tier.replace(' ', '_')}_last_success",
+            name=f"{coordinator.name} {tier} last refreshed",
+            device_class=SensorDeviceClass.TIMESTAMP,
+            value_fn=lambda c, endpoint=endpoint: c.stats.last_success.get(endpoint),
+        ))
+    return descriptions
+
 async def async_setup_entry(hass, config_entry, async_add_entities):
     coordinator = hass.data[KEY_POESWITCH][config_entry.entry_id]
 
     entities = []
-    for port_idx, port in coordinator.ports.items():
-        if port.get('is_poe_port', False):
+    for port in coordinator.ports:
+        port_idx = port.index
+        if port.is_poe_port:
             entities.append(PoePowerEntity(coordinator, port_idx, SensorEntityDescription(
                 key=f"port{port_idx} power",
                 name=f"{coordinator.name} port{port_idx} power",
                 native_unit_of_measurement=UnitOfPower.WATT,
                 device_class=SensorDeviceClass.POWER,
             )))
+            entities.append(PoeEnergyEntity(coordinator, port_idx, SensorEntityDescription(
+                key=f"port{port_idx} energy",
+                name=f"{coordinator.name} port{port_idx} energy",
+                native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+                device_class=SensorDeviceClass.ENERGY,
+                state_class=SensorStateClass.TOTAL_INCREASING,
+                suggested_display_precision=3,
+            )))
         entities.append(LinkSpeedEntity(coordinator, port_idx, SensorEntityDescription(
             key=f"port{port_idx} link speed",
             name=f"{coordinator.name} port{port_idx} link speed",
             entity_registry_enabled_default=False
         )))
+    entities.append(PollIntervalEntity(coordinator, SensorEntityDescription(
+        key="poll interval",
+        name=f"{coordinator.name} poll interval",
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        device_class=SensorDeviceClass.DURATION
+    )))
     entities.append(UptimeEntity(coordinator, SensorEntityDescription(
         key=f"uptime",
         name=f"{coordinator.name} uptime",
@@ -35,6 +181,10 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
         suggested_unit_of_measurement=UnitOfTime.DAYS,
         device_class=SensorDeviceClass.DURATION
     )))
+    for description in _total_descriptions(coordinator):
+        entities.append(TotalEntity(coordinator, description))
+    for description in _statistic_descriptions(coordinator):
+        entities.append(StatisticEntity(coordinator, description))
     _LOGGER.debug(f'Configuring {len(entities)} sensors')
     async_add_entities(entities, update_before_add=False)
 
@@ -61,12 +211,16 @@ class UptimeEntity(CoordinatorEntity, SensorEntity):
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
+        if not self.coordinator.endpoint_updated(ENDPOINT_SYSTEM):
+            return
         self._attr_native_value = self.coordinator.get_uptime()
         _LOGGER.debug(f"Uptime changed to {self._attr_native_value}")
         self.async_write_ha_state()
 
 class PoePowerEntity(CoordinatorEntity, SensorEntity):
     entity_description: SensorEntityDescription
+    # The recorder already has the readings these are made of
+    _unrecorded_attributes = frozenset({'power_min', 'power_max', 'power_mean', 'power_window'})
 
     def __init__(self, coordinator, port_idx, description: SensorEntityDescription):
         super().__init__(coordinator, context=port_idx)
@@ -86,10 +240,52 @@ class PoePowerEntity(CoordinatorEntity, SensorEntity):
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
+        if not self.coordinator.port_changed(self.coordinator_context, PortField.POWER):
+            return
         self._attr_native_value = self.coordinator.get_port_power(self.coordinator_context)
         _LOGGER.debug(f"Power value of port {self.coordinator_context} changed to {self._attr_native_value}")
         self.async_write_ha_state()
 
+    @property
+    def extra_state_attributes(self):
+        return self.coordinator.get_port_power_stats(self.coordinator_context)
+
+class PoeEnergyEntity(CoordinatorEntity, SensorEntity):
+    """Energy of a port integrated from its power readings."""
+    entity_description: SensorEntityDescription
+
+    def __init__(self, coordinator, port_idx, description: SensorEntityDescription):
+        # All energy entities are notified after the power page was read, not only on power changes
+        super().__init__(coordinator, context=CONTEXT_ENERGY)
+        self.entity_description = description
+        self._port = port_idx
+        self._attr_native_value = self._energy()
+        self._attr_unique_id = f"{self.coordinator.host}_{port_idx}_poe_energy"
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        """Return the device info."""
+        return DeviceInfo(
+            identifiers={
+                (DOMAIN, self.coordinator.host)
+            }
+        )
+
+    def _energy(self):
+        return round(self.coordinator.get_port_energy(self._port), 4)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        if not self.coordinator.endpoint_updated(ENDPOINT_POE):
+            return
+        energy = self._energy()
+        # Written once it grew by at least 0.1 Wh
+        if energy == self._attr_native_value and not self.coordinator.availability_changed:
+            return
+        self._attr_native_value = energy
+        self.async_write_ha_state()
+
 class LinkSpeedEntity(CoordinatorEntity, SensorEntity):
     entity_description: SensorEntityDescription
 
@@ -112,6 +308,83 @@ class LinkSpeedEntity(CoordinatorEntity, SensorEntity):
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
+        if not self.coordinator.port_changed(self.coordinator_context, PortField.SPEED):
+            return
         self._attr_native_value = self.coordinator.get_port_link_speed(self.coordinator_context)
         _LOGGER.debug(f"Link speed value of port {self.coordinator_context} changed to {self._attr_native_value}")
         self.async_write_ha_state()
+
+class PollIntervalEntity(CoordinatorEntity, SensorEntity):
+    entity_description: SensorEntityDescription
+
+    def __init__(self, coordinator, description: SensorEntityDescription):
+        super().__init__(coordinator, context=CONTEXT_DIAGNOSTICS)
+        self.entity_description = description
+        self._attr_native_value = self.coordinator.poll_interval.total_seconds()
+        self._attr_unique_id = f"{self.coordinator.host}_poll_interval"
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        """Return the device info."""
+        return DeviceInfo(
+            identifiers={
+                (DOMAIN, self.coordinator.host)
+            }
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        self._attr_native_value = self.coordinator.poll_interval.total_seconds()
+        _LOGGER.debug(f"Poll interval changed to {self._attr_native_value}")
+        self.async_write_ha_state()
+
+class StatisticEntity(CoordinatorEntity, SensorEntity):
+    """Request statistic of the switch, updated after every poll."""
+    entity_description: StatisticEntityDescription
+
+    def __init__(self, coordinator, description: StatisticEntityDescription):
+        super().__init__(coordinator, context=CONTEXT_STATISTICS)
+        self.entity_description = description
+        self._attr_unique_id = f"{self.coordinator.host}_{description.key}"
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        """Return the device info."""
+        return DeviceInfo(
+            identifiers={
+                (DOMAIN, self.coordinator.host)
+            }
+        )
+
+    @property
+    def available(self) -> bool:
+        # The statistics explain failing polls, so they stay available when polls fail
+        return True
+
+    @property
+    def native_value(self):
+        return self.entity_description.value_fn(self.coordinator)
+
+class TotalEntity(CoordinatorEntity, SensorEntity):
+    """Switch wide sum over the ports, written when it changed."""
+    entity_description: TotalEntityDescription
+
+    def __init__(self, coordinator, description: TotalEntityDescription):
+        super().__init__(coordinator, context=CONTEXT_TOTALS)
+        self.entity_description = description
+        self._attr_unique_id = f"{self.coordinator.host}_{description.key}"
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        """Return the device info."""
+        return DeviceInfo(
+            identifiers={
+                (DOMAIN, self.coordinator.host)
+            }
+        )
+
+    @property
+    def native_value(self):
+        return self.entity_description.value_fn(self.coordinator)
@@ -0,0 +1,77 @@
+"""Services of the ZyXEL POE integration."""
+import asyncio
+import logging
+
+import voluptuous as vol
+
+from homeassistant.core import callback, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.service import async_extract_referenced_entity_ids
+
+from .const import (
+    DOMAIN, KEY_POESWITCH, SERVICE_POWER_CYCLE, ATTR_OFF_TIME, DEFAULT_OFF_TIME, MAX_OFF_TIME,
+    POWER_CYCLE_MAX_SWITCHES,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Takes entities, devices and areas as target
+POWER_CYCLE_SCHEMA = cv.make_entity_service_schema({
+    vol.Optional(ATTR_OFF_TIME, default=DEFAULT_OFF_TIME): vol.All(vol.Coerce(float), vol.Range(min=1, max=MAX_OFF_TIME)),
+})
+
+
+def _group_ports(hass, entity_ids, indirect_ids=()):
+    """Group the port switches by the coordinator of their switch.
+
+    Entities of a targeted device or area that are no port switches are
+    skipped, entities that were named themselves must be port switches.
+    """
+    registry = er.async_get(hass)
+    coordinators = hass.data.get(KEY_POESWITCH, {})
+    groups = {}
+    for entity_id in sorted(entity_ids | set(indirect_ids)):
+        entry = registry.async_get(entity_id)
+        coordinator = coordinators.get(entry.config_entry_id) if entry and entry.platform == DOMAIN else None
+        port = None
+        if coordinator is not None:
+            port = next((p.index for p in coordinator.poe_ports() if entry.unique_id == f"{coordinator.host}_{p.index}_poe_switch"), None)
+        if port is None:
+            if entity_id not in entity_ids:
+                continue
+            raise HomeAssistantError(f"{entity_id} is not a POE port switch of a loaded {DOMAIN} switch")
+        groups.setdefault(coordinator, {})[port] = entity_id
+    return groups
+
+
+@callback
+def async_setup_services(hass):
+    semaphore = asyncio.Semaphore(POWER_CYCLE_MAX_SWITCHES)
+
+    async def power_cycle_switch(coordinator, ports, off_time):
+        async with semaphore:
+            results = await coordinator.async_power_cycle(list(ports), off_time)
+        return {ports[port]: result for port, result in results.items()}
+
+    async def async_power_cycle(call):
+        selected = async_extract_referenced_entity_ids(hass, call)
+        groups = _group_ports(hass, selected.referenced, selected.indirectly_referenced)
+        if not groups:
+            raise HomeAssistantError(f"No POE port switches of a loaded {DOMAIN} switch were targeted")
+        off_time = call.data[ATTR_OFF_TIME]
+        results = {}
+        for switch_results in await asyncio.gather(*(power_cycle_switch(coordinator, ports, off_time) for coordinator, ports in groups.items())):
+            results.update(switch_results)
+
+        failed = [entity_id for entity_id, result in results.items() if result['result'] == 'failed']
+        if call.return_response:
+            return {'ports': results}
+        if failed:
+            raise HomeAssistantError(f"Failed to power cycle {', '.join(failed)}")
+        return None
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_POWER_CYCLE, async_power_cycle, schema=POWER_CYCLE_SCHEMA, supports_response=SupportsResponse.OPTIONAL
+    )
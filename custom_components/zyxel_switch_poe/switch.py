@@ -1,12 +1,16 @@
+import asyncio
 import logging
 
+from abc import abstractmethod
+
 from homeassistant.core import callback
 from homeassistant.const import STATE_ON, STATE_OFF
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.helpers.device_registry import DeviceInfo
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.helpers.update_coordinator import CoordinatorEntity, UpdateFailed
 
-from .const import KEY_POESWITCH, DOMAIN
+from .const import KEY_POESWITCH, DOMAIN, ENDPOINT_SYSTEM, EVENT_WRITE_FAILED, WRITE_CONFIRM_TIMEOUT
+from .models import PortField
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -14,13 +18,65 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     coordinator = hass.data[KEY_POESWITCH][config_entry.entry_id]
 
     entities = []
-    for port_idx, _ in enumerate(coordinator.poe_ports()):
-        entities.append(PoePowerSwitchEntity(coordinator, port_idx))
+    for port in coordinator.poe_ports():
+        entities.append(PoePowerSwitchEntity(coordinator, port.index))
     entities.append(LedEcoSwitch(coordinator))
     _LOGGER.debug(f'Configuring {len(entities)} switches')
     async_add_entities(entities, update_before_add=False)
 
-class LedEcoSwitch(CoordinatorEntity, SwitchEntity):
+class OptimisticSwitch(CoordinatorEntity, SwitchEntity):
+    """Switch that shows a requested state until the switch confirms or rejects it."""
+
+    _pending = False
+
+    @property
+    def extra_state_attributes(self):
+        return {"pending": self._pending}
+
+    @abstractmethod
+    def _confirmed_state(self):
+        """State last read from the switch."""
+
+    @abstractmethod
+    def _confirmed_state_changed(self):
+        """Whether the last coordinator update changed the state read from the switch."""
+
+    @abstractmethod
+    async def _async_write(self, state):
+        """Write the state to the switch and wait until it was read back."""
+
+    async def _async_change(self, state):
+        if not self.coordinator.optimistic:
+            await self._async_write(state)
+            return
+
+        self._attr_is_on = state == STATE_ON
+        self._pending = True
+        self.async_write_ha_state()
+        try:
+            async with asyncio.timeout(WRITE_CONFIRM_TIMEOUT):
+                await self._async_write(state)
+        except (UpdateFailed, TimeoutError) as err:
+            error = str(err) or "Timed out waiting for confirmation"
+            _LOGGER.warning(f"Failed to turn {state} {self.name}, rolling back: {error}")
+            self.hass.bus.async_fire(EVENT_WRITE_FAILED, {"entity_id": self.entity_id, "state": state, "error": error})
+            raise
+        finally:
+            self._pending = False
+            self._attr_is_on = self._confirmed_state() == STATE_ON
+            self.async_write_ha_state()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        # The confirmed state is written when the pending change completes
+        if self._pending or not self._confirmed_state_changed():
+            return
+        self._attr_is_on = self._confirmed_state() == STATE_ON
+        _LOGGER.debug(f"State of {self.name} changed to {self._attr_is_on}")
+        self.async_write_ha_state()
+
+class LedEcoSwitch(OptimisticSwitch):
     def __init__(self, coordinator):
         super().__init__(coordinator)
         self._attr_name = f"{coordinator.name} LED ECO mode"
@@ -38,24 +94,23 @@ class LedEcoSwitch(CoordinatorEntity, SwitchEntity):
 
     async def async_turn_on(self):
         _LOGGER.debug(f"Turning on LED ECO switch")
-        self.coordinator.set_led_eco_switch_state(STATE_ON)
-        await self.coordinator.change_state()
-        await self.coordinator.async_request_refresh()
+        await self._async_change(STATE_ON)
 
     async def async_turn_off(self):
         _LOGGER.debug(f"Turning off LED ECO switch")
-        self.coordinator.set_led_eco_switch_state(STATE_OFF)
-        await self.coordinator.change_state()
-        await self.coordinator.async_request_refresh()
+        await self._async_change(STATE_OFF)
 
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        self._attr_is_on = self.coordinator.get_led_eco_switch_state() == STATE_ON
-        _LOGGER.debug(f"State of LED ECO switch changed to {self._attr_is_on}")
-        self.async_write_ha_state()
+    def _confirmed_state(self):
+        return self.coordinator.get_led_eco_switch_state()
+
+    def _confirmed_state_changed(self):
+        return self.coordinator.endpoint_updated(ENDPOINT_SYSTEM)
+
+    async def _async_write(self, state):
+        self.coordinator.set_led_eco_switch_state(state)
+        await self.coordinator.change_led_state()
 
-class PoePowerSwitchEntity(CoordinatorEntity, SwitchEntity):
+class PoePowerSwitchEntity(OptimisticSwitch):
     def __init__(self, coordinator, port_idx):
         super().__init__(coordinator, context=port_idx)
         self._attr_name = f"{coordinator.name} port{self.coordinator_context}"
@@ -73,19 +128,17 @@ class PoePowerSwitchEntity(CoordinatorEntity, SwitchEntity):
 
     async def async_turn_on(self):
         _LOGGER.debug(f"Turning on switch {self.coordinator_context}")
-        self.coordinator.set_port_state(self.coordinator_context, STATE_ON)
-        await self.coordinator.change_state()
-        await self.coordinator.async_request_refresh()
+        await self._async_change(STATE_ON)
 
     async def async_turn_off(self):
         _LOGGER.debug(f"Turning off switch {self.coordinator_context}")
-        self.coordinator.set_port_state(self.coordinator_context, STATE_OFF)
-        await self.coordinator.change_state()
-        await self.coordinator.async_request_refresh()
+        await self._async_change(STATE_OFF)
 
-    @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handle updated data from the coordinator."""
-        self._attr_is_on = self.coordinator.get_port_state(self.coordinator_context) == STATE_ON
-        _LOGGER.debug(f"State of port {self.coordinator_context} changed to {self._attr_is_on}")
-        self.async_write_ha_state()
+    def _confirmed_state(self):
+        return self.coordinator.get_port_state(self.coordinator_context)
+
+    def _confirmed_state_changed(self):
+        return self.coordinator.port_changed(self.coordinator_context, PortField.POE_ENABLED)
+
+    async def _async_write(self, state):
+        await self.coordinator.async_set_port_state(self.coordinator_context, state)
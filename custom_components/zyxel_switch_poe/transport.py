@@ -0,0 +1,148 @@
+"""HTTP transport for the web server of the switch."""
+import time
+
+from enum import Enum
+from typing import NamedTuple
+
+import aiohttp
+
+LOGIN_FORM_MARKER = b'action="login.cgi"'
+# The login form is near the top of the login page, only this part of a body is searched for it
+LOGIN_PROBE_BYTES = 4096
+# The web server of the switch drops idle connections, reuse them only for this many seconds
+KEEPALIVE_TIMEOUT = 15
+DNS_CACHE_TTL = 300
+
+
+class ResponseKind(Enum):
+    OK = "ok"
+    AUTH_REQUIRED = "auth_required"
+    TRANSIENT = "transient"
+    FATAL = "fatal"
+
+
+class Response(NamedTuple):
+    kind: ResponseKind
+    status: int | None = None
+    body: bytes = b""
+    charset: str = "utf-8"
+
+    @property
+    def ok(self):
+        return self.kind is ResponseKind.OK
+
+    @property
+    def text(self):
+        """Body decoded on demand, only responses that are parsed need it."""
+        return self.body.decode(self.charset, errors="replace")
+
+
+def is_login_page(path, status, headers, body):
+    """Whether the switch answered with its login page instead of the requested page."""
+    if status in (401, 403):
+        return True
+    if "login" in headers.get("Location", ""):
+        return True
+    if LOGIN_FORM_MARKER in body[:LOGIN_PROBE_BYTES]:
+        return True
+    # A data page served as HTML can only be the login page, confirm it on the whole body
+    if path.endswith(".js") and headers.get("Content-Type", "").startswith("text/html"):
+        return LOGIN_FORM_MARKER in body
+    return False
+
+
+def classify_response(path, status, headers, body, charset=None, expects_login_page=False):
+    """Decide from status, headers and body whether a request succeeded and whether to retry it."""
+    charset = charset or "utf-8"
+    if status >= 500 or status in (408, 429):
+        return Response(ResponseKind.TRANSIENT, status, body, charset)
+    if not expects_login_page and is_login_page(path, status, headers, body):
+        return Response(ResponseKind.AUTH_REQUIRED, status, body, charset)
+    if status >= 400:
+        return Response(ResponseKind.FATAL, status, body, charset)
+    return Response(ResponseKind.OK, status, body, charset)
+
+
+class HttpTransport:
+    """Keep-alive HTTP client for a single switch.
+
+    The embedded web server copes badly with many sockets, connections are
+    capped to the number of parallel requests and reused while they are idle
+    for less than KEEPALIVE_TIMEOUT seconds. Connections opened and reused
+    and the connect, time to first byte and body time of each requested page
+    are recorded.
+    """
+
+    def __init__(self, host, max_connections=1):
+        self.host = host
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self.requests = 0
+        self.bytes_received = 0
+        # Per path, seconds spent on connect, ttfb and body by its last request
+        self.timings = {}
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_start.append(self._on_connection_create_start)
+        trace_config.on_connection_create_end.append(self._on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(self._on_connection_reuseconn)
+        trace_config.on_request_start.append(self._on_request_start)
+        trace_config.on_request_end.append(self._on_request_end)
+
+        connector = aiohttp.TCPConnector(
+            limit=max_connections,
+            limit_per_host=max_connections,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=DNS_CACHE_TTL,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            cookie_jar=aiohttp.CookieJar(unsafe=True),
+            trace_configs=[trace_config],
+        )
+
+    @property
+    def cookie_jar(self):
+        return self._session.cookie_jar
+
+    async def request(self, method, path, data=None, timeout=None, expects_login_page=False):
+        """Request a page and classify the response, connection errors and timeouts are raised."""
+        timing = {'connect': 0.0}
+        async with self._session.request(method, f"http://{self.host}/{path}", data=data, timeout=aiohttp.ClientTimeout(total=timeout), trace_request_ctx=timing) as resp:
+            body = await resp.read()
+        timing['body'] = time.monotonic() - timing.pop('headers')
+        del timing['start']
+        self.timings[path] = timing
+        self.requests += 1
+        self.bytes_received += len(body)
+        return classify_response(path, resp.status, resp.headers, body, resp.charset, expects_login_page)
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'bytes_received': self.bytes_received,
+            'connections_opened': self.connections_opened,
+            'connections_reused': self.connections_reused,
+            'timings': self.timings,
+        }
+
+    async def close(self):
+        await self._session.close()
+
+    async def _on_connection_create_start(self, session, ctx, params):
+        ctx.trace_request_ctx['connect'] = time.monotonic()
+
+    async def _on_connection_create_end(self, session, ctx, params):
+        self.connections_opened += 1
+        ctx.trace_request_ctx['connect'] = time.monotonic() - ctx.trace_request_ctx['connect']
+
+    async def _on_connection_reuseconn(self, session, ctx, params):
+        self.connections_reused += 1
+
+    async def _on_request_start(self, session, ctx, params):
+        ctx.trace_request_ctx['start'] = time.monotonic()
+
+    async def _on_request_end(self, session, ctx, params):
+        timing = ctx.trace_request_ctx
+        timing['headers'] = time.monotonic()
+        timing['ttfb'] = timing['headers'] - timing['start'] - timing['connect']
@@ -0,0 +1,212 @@
+"""Benchmark of poll cycles against a fleet of simulated switches.
+
+Starts tools/fake_switch.py in a separate process and polls 1, 10, 100 and
+500 switches with a ZyxelCoordinator each. Every cycle refreshes all pages
+of all switches at once. Reported per fleet size: wall and CPU time per
+cycle, p50/p99 request latency per page, event loop lag, the memory a
+cycle keeps and its peak, and the number of requests and logins.
+
+    python tools/bench_fleet.py [--switches 1,10,100,500] [--cycles 5] [--latency 0.02] [--output bench_fleet.json]
+
+Needs Home Assistant installed, the results are written as JSON to compare
+them between releases.
+"""
+import gc
+import sys
+import json
+import time
+import socket
+import asyncio
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+
+from pathlib import Path
+from statistics import median
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components.zyxel_switch_poe import ZyxelCoordinator  # noqa: E402
+from custom_components.zyxel_switch_poe.scheduler import PollScheduler  # noqa: E402
+
+PASSWORD = "1234"
+# Loop lag is sampled by a task that wants to run every this many seconds
+LAG_PROBE_INTERVAL = 0.01
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def start_switches(args, count):
+    command = [
+        sys.executable, str(ROOT / "tools" / "fake_switch.py"),
+        "--count", str(count), "--port", str(args.port), "--model", args.model, "--password", PASSWORD,
+        "--latency", str(args.latency), "--jitter", str(args.jitter),
+    ]
+    server = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    # The last switch listens once all of them are started
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", args.port + count - 1), timeout=1).close()
+            return server
+        except OSError:
+            if server.poll() is not None:
+                break
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("Simulated switches did not start")
+
+
+class LoopLagProbe:
+    """Measures how late a periodic task is woken up while the loop is busy."""
+
+    def __init__(self):
+        self.lags = []
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(LAG_PROBE_INTERVAL)
+            self.lags.append(time.monotonic() - start - LAG_PROBE_INTERVAL)
+
+    def stop(self):
+        self._task.cancel()
+
+
+async def poll_cycle(coordinators):
+    for coordinator in coordinators:
+        for endpoint in coordinator.endpoint_intervals:
+            coordinator.invalidate_endpoint(endpoint)
+    await asyncio.gather(*(coordinator.async_refresh() for coordinator in coordinators))
+
+
+async def bench_fleet(hass, args, count):
+    scheduler = PollScheduler(hass)
+    coordinators = [
+        ZyxelCoordinator(hass, f"switch{i}", f"127.0.0.1:{args.port + i}", PASSWORD, 30, 10, 1, scheduler)
+        for i in range(count)
+    ]
+
+    # The first cycle logs in and learns the models, it is reported on its own
+    start = time.monotonic()
+    await poll_cycle(coordinators)
+    first_cycle = time.monotonic() - start
+
+    walls, cpus = [], []
+    probe = LoopLagProbe()
+    probe.start()
+    for _ in range(args.cycles):
+        start, cpu_start = time.monotonic(), time.process_time()
+        await poll_cycle(coordinators)
+        walls.append(time.monotonic() - start)
+        cpus.append(time.process_time() - cpu_start)
+    probe.stop()
+
+    # Tracing allocations slows everything down, so it gets a cycle of its own
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    await poll_cycle(coordinators)
+    _, peak = tracemalloc.get_traced_memory()
+    # Blocks freed within the cycle do not show in the difference, it is what the cycle keeps
+    retained = tracemalloc.take_snapshot().compare_to(before, "filename")
+    tracemalloc.stop()
+
+    latencies = {}
+    for coordinator in coordinators:
+        for path, histogram in coordinator.latencies.items():
+            latencies.setdefault(path, []).extend(histogram.samples())
+
+    result = {
+        "switches": count,
+        "cycles": args.cycles,
+        "failed_switches": sum(1 for coordinator in coordinators if not coordinator.last_update_success),
+        "first_cycle_s": first_cycle,
+        "cycle_wall_s": {"p50": median(walls), "max": max(walls)},
+        "cycle_cpu_s": {"p50": median(cpus), "max": max(cpus)},
+        "loop_lag_s": {"p50": percentile(probe.lags, 50), "p99": percentile(probe.lags, 99), "max": max(probe.lags, default=None)},
+        "request_latency_s": {
+            path: {"p50": percentile(samples, 50), "p99": percentile(samples, 99), "samples": len(samples)}
+            for path, samples in sorted(latencies.items())
+        },
+        "cycle_retained_bytes": sum(stat.size_diff for stat in retained),
+        "cycle_retained_blocks": sum(stat.count_diff for stat in retained),
+        "cycle_peak_bytes": peak,
+        "requests": sum(coordinator.transport_stats()["requests"] for coordinator in coordinators),
+        "connections_opened": sum(coordinator.transport_stats()["connections_opened"] for coordinator in coordinators),
+        "logins": sum(coordinator.login_count for coordinator in coordinators),
+    }
+
+    # Free the single session of every switch for the next fleet size
+    for coordinator in coordinators:
+        await coordinator.logout()
+        await coordinator.async_close()
+    return result
+
+
+async def run(args, sizes):
+    hass = HomeAssistant(tempfile.mkdtemp())
+    results = []
+    for count in sizes:
+        result = await bench_fleet(hass, args, count)
+        results.append(result)
+        print(
+            f"{count:4d} switches: cycle {result['cycle_wall_s']['p50'] * 1000:8.1f} ms wall"
+            f" {result['cycle_cpu_s']['p50'] * 1000:8.1f} ms cpu,"
+            f" loop lag p99 {result['loop_lag_s']['p99'] * 1000:6.1f} ms,"
+            f" {result['requests']} requests, {result['logins']} logins",
+            flush=True,
+        )
+    return results
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    args.add_argument("--switches", default="1,10,100,500", help="comma separated fleet sizes")
+    args.add_argument("--cycles", type=int, default=5, help="measured poll cycles per fleet size")
+    args.add_argument("--model", default="GS1200-8HP")
+    args.add_argument("--port", type=int, default=18000, help="port of the first simulated switch")
+    args.add_argument("--latency", type=float, default=0.02, help="seconds the simulated switches take to answer")
+    args.add_argument("--jitter", type=float, default=0.01)
+    args.add_argument("--output", default="bench_fleet.json")
+    args = args.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    sizes = [int(size) for size in args.switches.split(",")]
+    # Started before Home Assistant, which does not allow the blocking wait for the servers
+    server = start_switches(args, max(sizes))
+    try:
+        results = asyncio.run(run(args, sizes))
+    finally:
+        server.terminate()
+        server.wait()
+    with open(args.output, "w") as output:
+        json.dump({
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "results": results,
+        }, output, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
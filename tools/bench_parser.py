@@ -0,0 +1,133 @@
+"""Micro-benchmark of the data page parser.
+
+Compares DataPage.parse against the per-field re.findall scans it replaced
+on payloads like the ones served by a GS1200-8HP v2, padded to larger sizes.
+
+    python tools/bench_parser.py [--number 20000]
+"""
+import re
+import sys
+import timeit
+import argparse
+import importlib.util
+
+from pathlib import Path
+
+PARSER_PATH = Path(__file__).resolve().parent.parent / "custom_components" / "zyxel_switch_poe" / "parser.py"
+
+SYSTEM_DATA = """var sys_dev_name = 'GS1200-8HP';
+var sys_fmw_ver = 'V2.00(ABZZ.3)C0';
+var sys_MAC = 'bc:cf:4f:00:11:22';
+var model_name = 'GS1200-8HP v2';
+var sys_IP = '192.168.1.3';
+var sys_sbnt_mask = '255.255.255.0';
+var sys_gw = '192.168.1.1';
+var sys_led_state = '0';
+var system_uptime = '1234567';
+"""
+
+LINK_DATA = """var portstatus = ['Up','Down','Up','Up','Down','Down','Up','Down'];
+var speed = ['1000M','','100M','1000M','','','1000M',''];
+var Stats = [[1,2,3],[4,5,6]];
+"""
+
+POE_DATA = """var port_power = [ 4.3, 0.0, 6.1, 12.7 ];
+var maxPower = 60;
+var portPoE = '15';
+"""
+
+# Some firmware breaks long arrays over several lines
+POE_MULTILINE_DATA = """var port_power = [ 4.3,
+ 0.0,
+ 6.1,
+ 12.7 ];
+var maxPower = 60;
+var portPoE = '15';
+"""
+
+PAGE_NAMES = {
+    "system": ("sys_fmw_ver", "model_name", "sys_MAC", "sys_dev_name", "sys_led_state", "system_uptime"),
+    "link": ("portstatus", "speed"),
+    "poe": ("port_power", "portPoE"),
+}
+PAGE_NAMES["poe_lines"] = PAGE_NAMES["poe"]
+
+LEGACY_PATTERNS = {
+    "system": [
+        r"sys_fmw_ver\s?=\s?'(.+)';",
+        r"model_name\s?=\s?'(.+)';",
+        r"sys_MAC\s?=\s?'(.+)';",
+        r"sys_dev_name\s?=\s?'(.+)';",
+        r"sys_led_state\s?=\s?'(.+)';",
+        r"system_uptime\s?=\s?'(.+)';",
+    ],
+    "link": [r"portstatus\s?=\s?\[(.+)\];", r"speed\s?=\s?\[(.+)\];"],
+    "poe": [r"port_power\s?=\s?\[([\s\d+\.,]+)\]", r"portPoE\s?=\s?'(\d+)';"],
+}
+LEGACY_PATTERNS["poe_lines"] = LEGACY_PATTERNS["poe"]
+
+
+def load_parser():
+    # Loaded from its file so the benchmark runs without Home Assistant installed
+    spec = importlib.util.spec_from_file_location("zyxel_parser", PARSER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def legacy_parse(text, patterns):
+    """The separate scans and conversions the fetchers did before DataPage."""
+    values = []
+    for pattern in patterns:
+        m = re.findall(pattern, text)
+        if m and "port_power" in pattern:
+            values.append([float(x.strip()) for x in m[0].split(',')])
+        elif m and "[" in pattern:
+            values.append([x.strip().replace("'", "") for x in m[0].split(',')])
+        elif m:
+            values.append(m[0])
+    return values
+
+
+def padded(text, size):
+    """Grow a payload to roughly size bytes with unrelated variables, like larger firmware pages."""
+    lines = [text]
+    i = 0
+    while sum(len(line) for line in lines) < size:
+        lines.append(f"var unused_{i} = '{'x' * 40}';\n")
+        i += 1
+    return "".join(lines)
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    args.add_argument("--number", type=int, default=20000, help="parses per measurement")
+    args = args.parse_args()
+
+    DataPage = load_parser().DataPage
+    payloads = {"system": SYSTEM_DATA, "link": LINK_DATA, "poe": POE_DATA, "poe_lines": POE_MULTILINE_DATA}
+    pages = {name: DataPage(*names) for name, names in PAGE_NAMES.items()}
+
+    # Both parsers must read the same values before their speed means anything
+    for name, text in payloads.items():
+        values = pages[name].parse(text)
+        new = [values[field] for field in PAGE_NAMES[name] if field in values]
+        old = legacy_parse(text, LEGACY_PATTERNS[name])
+        if new != old:
+            print(f"{name}: DataPage parsed {new}, the legacy scans {old}")
+            return 1
+
+    print(f"{'page':9} {'bytes':>7} {'DataPage us':>12} {'legacy us':>10}")
+    for size in (0, 4096, 32768):
+        for name, text in payloads.items():
+            text = padded(text, size)
+            number = max(1, args.number * 256 // max(256, len(text)))
+            # The best of a few runs, the others are slowed down by whatever else the machine does
+            new = min(timeit.repeat(lambda: pages[name].parse(text), number=number, repeat=5)) / number * 1e6
+            old = min(timeit.repeat(lambda: legacy_parse(text, LEGACY_PATTERNS[name]), number=number, repeat=5)) / number * 1e6
+            print(f"{name:9} {len(text):7d} {new:12.2f} {old:10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
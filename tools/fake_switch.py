@@ -0,0 +1,259 @@
+"""Simulated ZyXEL GS1200-5HP v2 / GS1200-8HP v2 web server.
+
+Serves the pages used by the integration with the semantics of the real
+switch: a single login session at a time, the obfuscated password of the
+login form, the javascript data pages and the port and LED configuration
+forms. Latency, jitter, server errors and hanging requests can be injected.
+
+    python tools/fake_switch.py [--model GS1200-8HP] [--count 10] [--port 8080] [--latency 0.04]
+
+With --count several switches listen on consecutive ports, each is added
+to Home Assistant as 127.0.0.1:<port>.
+"""
+import sys
+import time
+import random
+import asyncio
+import secrets
+import argparse
+
+from dataclasses import dataclass
+
+from aiohttp import web
+
+MODELS = {
+    "GS1200-5HP": {"model_name": "GS1200-5HP v2", "ports": 5, "port_state": 31},
+    "GS1200-8HP": {"model_name": "GS1200-8HP v2", "ports": 8, "port_state": 255},
+}
+# Both models supply power on their first four ports
+POE_PORTS = 4
+MAX_POWER = 60
+
+LOGIN_PAGE = """<html><head><title>GS1200</title></head><body>
+<form name="login" method="post" action="login.cgi">
+<input type="password" name="password">
+</form></body></html>
+"""
+LOGGED_IN_ALREADY_PAGE = """<html><body><script>alert("Someone has already logged in the switch, logged in already");</script></body></html>
+"""
+OK_PAGE = """<html><body><script>window.location.replace("/");</script></body></html>
+"""
+
+
+def decode(encoded):
+    """Reverse of encode() of the integration: every other character, shifted up by the password length."""
+    password = encoded[1::2]
+    return "".join(chr(ord(c) + len(password)) for c in password)
+
+
+@dataclass
+class Faults:
+    # Seconds added to every response, plus up to jitter seconds at random
+    latency: float = 0.0
+    jitter: float = 0.0
+    # Fraction of requests answered with a 500 error
+    error_rate: float = 0.0
+    # Fraction of requests that hang for hang_time seconds before they are answered
+    timeout_rate: float = 0.0
+    hang_time: float = 30.0
+
+
+class FakeSwitch:
+    def __init__(self, model="GS1200-8HP", password="1234", session_timeout=300, faults=None, seed=None):
+        self.model = MODELS[model]
+        self.password = password
+        self.session_timeout = session_timeout
+        self.faults = faults or Faults()
+        self._random = random.Random(seed)
+        self.name = model
+        self.mac = "bc:cf:4f:%02x:%02x:%02x" % tuple(self._random.randrange(256) for _ in range(3))
+        self.led_state = 1
+        self.poe_enabled = [True] * POE_PORTS
+        self.link_up = [self._random.random() < 0.7 for _ in range(self.model["ports"])]
+        self.booted = time.monotonic()
+        self._token = None
+        self._token_used = 0.0
+        # Requests per path, logins and lockouts for benchmarks
+        self.requests = {}
+        self.logins = 0
+        self.lockouts = 0
+        self._runner = None
+
+        self.app = web.Application()
+        self.app.router.add_post("/login.cgi", self.login)
+        self.app.router.add_get("/logout.html", self.logout)
+        self.app.router.add_get("/system_data.js", self.system_data)
+        self.app.router.add_get("/link_data.js", self.link_data)
+        self.app.router.add_get("/port_state_data.js", self.port_state_data)
+        self.app.router.add_get("/poe_data.js", self.poe_data)
+        self.app.router.add_post("/port_state_set.cgi", self.port_state_set)
+        self.app.router.add_post("/led_cfg.cgi", self.led_cfg)
+        self.app.middlewares.append(self._inject_faults)
+
+    async def start(self, host="127.0.0.1", port=8080):
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    def reboot(self):
+        self.booted = time.monotonic()
+        self._token = None
+
+    @web.middleware
+    async def _inject_faults(self, request, handler):
+        self.requests[request.path] = self.requests.get(request.path, 0) + 1
+        faults = self.faults
+        delay = faults.latency + self._random.random() * faults.jitter
+        if faults.timeout_rate and self._random.random() < faults.timeout_rate:
+            delay += faults.hang_time
+        if delay:
+            await asyncio.sleep(delay)
+        if faults.error_rate and self._random.random() < faults.error_rate:
+            return web.Response(status=500, text="Internal Server Error")
+        return await handler(request)
+
+    def _session_active(self):
+        return self._token is not None and time.monotonic() - self._token_used < self.session_timeout
+
+    def _logged_in(self, request):
+        if not self._session_active() or request.cookies.get("token") != self._token:
+            return False
+        self._token_used = time.monotonic()
+        return True
+
+    def _login_page(self):
+        return web.Response(text=LOGIN_PAGE, content_type="text/html")
+
+    def _javascript(self, values):
+        lines = []
+        for name, value in values.items():
+            if isinstance(value, list):
+                value = "[" + ",".join(f"'{v}'" if isinstance(v, str) else str(v) for v in value) + "]"
+            elif isinstance(value, str):
+                value = f"'{value}'"
+            lines.append(f"var {name} = {value};")
+        return web.Response(text="\n".join(lines) + "\n", content_type="application/javascript")
+
+    async def login(self, request):
+        form = await request.post()
+        if decode(form.get("password", "")) != self.password:
+            return self._login_page()
+        # Only one web session at a time, unless the same client logs in again
+        if self._session_active() and request.cookies.get("token") != self._token:
+            self.lockouts += 1
+            return web.Response(text=LOGGED_IN_ALREADY_PAGE, content_type="text/html")
+        self.logins += 1
+        self._token = secrets.token_hex(16)
+        self._token_used = time.monotonic()
+        response = web.Response(text=OK_PAGE, content_type="text/html")
+        response.set_cookie("token", self._token)
+        return response
+
+    async def logout(self, request):
+        if self._logged_in(request):
+            self._token = None
+        return self._login_page()
+
+    async def system_data(self, request):
+        if not self._logged_in(request):
+            return self._login_page()
+        return self._javascript({
+            "sys_dev_name": self.name,
+            "sys_fmw_ver": "V2.00(ABZZ.3)C0",
+            "sys_MAC": self.mac,
+            "model_name": self.model["model_name"],
+            "sys_IP": request.host.split(":")[0],
+            "sys_sbnt_mask": "255.255.255.0",
+            "sys_gw": "192.168.1.1",
+            "sys_led_state": str(self.led_state),
+            "system_uptime": str(int(time.monotonic() - self.booted)),
+        })
+
+    async def link_data(self, request):
+        if not self._logged_in(request):
+            return self._login_page()
+        # Links go up and down now and then
+        for i in range(len(self.link_up)):
+            if self._random.random() < 0.01:
+                self.link_up[i] = not self.link_up[i]
+        return self._javascript({
+            "portstatus": ["Up" if up else "Down" for up in self.link_up],
+            "speed": ["1000M" if up else "" for up in self.link_up],
+            "Stats": [[0, 0, 0]] * len(self.link_up),
+        })
+
+    async def port_state_data(self, request):
+        if not self._logged_in(request):
+            return self._login_page()
+        mask = sum(1 << i for i, enabled in enumerate(self.poe_enabled) if enabled)
+        return self._javascript({"portPoE": str(mask)})
+
+    async def poe_data(self, request):
+        if not self._logged_in(request):
+            return self._login_page()
+        power = [
+            round(3 + i * 1.5 + self._random.random(), 1) if enabled and self.link_up[i] else 0.0
+            for i, enabled in enumerate(self.poe_enabled)
+        ]
+        return self._javascript({"port_power": power, "maxPower": MAX_POWER})
+
+    async def port_state_set(self, request):
+        if not self._logged_in(request):
+            return self._login_page()
+        form = await request.post()
+        if int(form.get("g_port_state", -1)) != self.model["port_state"]:
+            return web.Response(status=400, text="Bad Request")
+        mask = int(form["g_port_poe"])
+        self.poe_enabled = [bool(mask & (1 << i)) for i in range(POE_PORTS)]
+        return web.Response(text=OK_PAGE, content_type="text/html")
+
+    async def led_cfg(self, request):
+        if not self._logged_in(request):
+            return self._login_page()
+        form = await request.post()
+        self.led_state = int(form["led_state_f"])
+        return web.Response(text=OK_PAGE, content_type="text/html")
+
+
+async def serve(args):
+    faults = Faults(args.latency, args.jitter, args.error_rate, args.timeout_rate, args.hang_time)
+    switches = []
+    for i in range(args.count):
+        switch = FakeSwitch(args.model, args.password, args.session_timeout, faults)
+        await switch.start(args.host, args.port + i)
+        switches.append(switch)
+    print(f"Serving {args.count} {args.model} on {args.host}:{args.port}-{args.port + args.count - 1}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for switch in switches:
+            await switch.stop()
+
+
+def main():
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    args.add_argument("--model", choices=MODELS, default="GS1200-8HP")
+    args.add_argument("--password", default="1234")
+    args.add_argument("--host", default="127.0.0.1")
+    args.add_argument("--port", type=int, default=8080)
+    args.add_argument("--count", type=int, default=1, help="switches on consecutive ports")
+    args.add_argument("--session-timeout", type=float, default=300, help="seconds an unused session stays logged in")
+    args.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    args.add_argument("--jitter", type=float, default=0.0, help="up to this many seconds added at random")
+    args.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with a 500 error")
+    args.add_argument("--timeout-rate", type=float, default=0.0, help="fraction of requests that hang")
+    args.add_argument("--hang-time", type=float, default=30.0, help="seconds a hanging request takes")
+    args = args.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
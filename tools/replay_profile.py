@@ -0,0 +1,126 @@
+"""Record the traffic of a switch and profile poll cycles replayed from it.
+
+A transcript holds the requests of a coordinator and the responses of the
+switch, with passwords and login tokens redacted. It is recorded by the
+"record the requests" option of the integration, which writes to
+<config>/zyxel_switch_poe/<host>.jsonl, or from the command line:
+
+    python tools/replay_profile.py record --host 192.168.1.3 --password secret [--cycles 5] switch.jsonl
+
+Replaying a transcript runs poll cycles of a ZyxelCoordinator against the
+recorded responses under cProfile, without a switch. By default responses
+are answered right away to profile the parsing and the poll pipeline, with
+--speed they take their recorded time divided by the speed.
+
+    python tools/replay_profile.py profile switch.jsonl [--cycles 100] [--speed 1] [--top 25] [--output replay.prof]
+
+Needs Home Assistant installed.
+"""
+import sys
+import time
+import pstats
+import asyncio
+import logging
+import argparse
+import cProfile
+import tempfile
+
+from pathlib import Path
+from statistics import median
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components.zyxel_switch_poe import ZyxelCoordinator  # noqa: E402
+from custom_components.zyxel_switch_poe.recording import ReplayTransport, load_transcript  # noqa: E402
+
+# The replayed switch is only known by this name
+REPLAY_HOST = "replay.invalid"
+
+
+async def poll_cycle(coordinator):
+    for endpoint in coordinator.endpoint_intervals:
+        coordinator.invalidate_endpoint(endpoint)
+    await coordinator.async_refresh()
+
+
+async def record(args):
+    hass = HomeAssistant(tempfile.mkdtemp())
+    coordinator = ZyxelCoordinator(hass, args.host, args.host, args.password, 30, transcript=str(Path(args.transcript).resolve()))
+    try:
+        for _ in range(args.cycles):
+            await poll_cycle(coordinator)
+            if not coordinator.last_update_success:
+                print(f"Poll failed: {coordinator.last_exception}")
+        # The transcript is easier to replay when it starts with a login
+        await coordinator.logout()
+    finally:
+        await coordinator.async_close()
+    print(f"Recorded {args.cycles} poll cycles of {coordinator.device_info.get('model')} to {args.transcript}")
+    return 0
+
+
+async def profile(args):
+    entries = load_transcript(args.transcript)
+    hass = HomeAssistant(tempfile.mkdtemp())
+    transport = ReplayTransport(REPLAY_HOST, entries, args.speed)
+    coordinator = ZyxelCoordinator(hass, "replay", REPLAY_HOST, "replay", 30, transport=transport)
+
+    # The first cycle logs in and learns the model, it is not profiled
+    await poll_cycle(coordinator)
+    if not coordinator.last_update_success:
+        print(f"Replay failed: {coordinator.last_exception}")
+        return 1
+
+    walls = []
+    profiler = cProfile.Profile()
+    for _ in range(args.cycles):
+        start = time.perf_counter()
+        profiler.enable()
+        await poll_cycle(coordinator)
+        profiler.disable()
+        walls.append(time.perf_counter() - start)
+    failed = not coordinator.last_update_success
+    await coordinator.async_close()
+
+    stats = transport.stats()
+    print(
+        f"{args.cycles} cycles of {coordinator.device_info.get('model')} from {len(entries)} recorded requests:"
+        f" {median(walls) * 1000:.2f} ms median, {max(walls) * 1000:.2f} ms max per cycle,"
+        f" {stats['requests']} requests, {stats['missing_responses']} without a recorded response"
+        + (", last poll failed" if failed else "")
+    )
+    if args.output:
+        profiler.dump_stats(args.output)
+        print(f"Profile written to {args.output}")
+    pstats.Stats(profiler).sort_stats(args.sort).print_stats(args.top)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="record the traffic of a switch")
+    record_parser.add_argument("transcript")
+    record_parser.add_argument("--host", required=True)
+    record_parser.add_argument("--password", required=True)
+    record_parser.add_argument("--cycles", type=int, default=5, help="poll cycles to record")
+
+    profile_parser = commands.add_parser("profile", help="profile poll cycles replayed from a transcript")
+    profile_parser.add_argument("transcript")
+    profile_parser.add_argument("--cycles", type=int, default=100, help="profiled poll cycles")
+    profile_parser.add_argument("--speed", type=float, default=None, help="replay at the recorded timing divided by this, at once when not set")
+    profile_parser.add_argument("--sort", default="cumulative", help="pstats sort key")
+    profile_parser.add_argument("--top", type=int, default=25, help="functions to print")
+    profile_parser.add_argument("--output", help="write the profile for snakeviz or pstats")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+    return asyncio.run(record(args) if args.command == "record" else profile(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())